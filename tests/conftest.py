@@ -1,6 +1,8 @@
 import os
 import sys
 
+import pytest
+
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
@@ -31,3 +33,11 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_test_settings():
+    """Окружение тестов из core.testing: свой файл кэша, строгие бюджеты."""
+    from core.testing import isolated_settings
+    with isolated_settings():
+        yield
@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        if settings.SQLITE_PRAGMAS:
+            from .sqlite import tune_connection
+            connection_created.connect(tune_connection)
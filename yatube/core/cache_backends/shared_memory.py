@@ -0,0 +1,318 @@
+"""
+Кэш в разделяемой памяти для всех процессов сервера на одной машине.
+
+Данные лежат в файле, отображённом в память (mmap), — в таблице слотов
+фиксированного размера. Ключ может лежать только в окне из PROBE
+соседних слотов, выбранном по его хешу. Если свободных слотов в окне
+нет, запись вытесняется по алгоритму CLOCK: чтение ставит слоту бит
+обращения, а запись идёт по окну от общей «стрелки», сбрасывает биты и
+занимает первый слот без бита.
+
+Чтение не берёт блокировок. У каждого слота есть счётчик версий
+(seqlock): на время записи писатель делает его нечётным, а читатель
+повторяет чтение, если счётчик нечётен или изменился за время чтения.
+Писатели сериализуются блокировкой файла (flock) и потоковой
+блокировкой процесса.
+
+Значение вместе с ключом должно помещаться в слот (SLOT_SIZE минус
+заголовок), иначе оно просто не кэшируется.
+
+Файл с другой разметкой (SLOTS, SLOT_SIZE) не перезаписывается: его
+могут держать отображённым другие процессы, и после усечения они
+упали бы с SIGBUS. Такой файл нужно удалить, остановив сервер.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+MAGIC = b'YTCACHE1'
+# Заголовок файла: сигнатура, число слотов, размер слота; затем стрелка.
+HEADER = struct.Struct('<8sQQ')
+HAND = struct.Struct('<Q')
+HAND_OFFSET = HEADER.size
+HEADER_SIZE = 64
+# Заголовок слота: версия, хеш ключа, срок жизни, длина ключа,
+# бит обращения, длина значения.
+SLOT = struct.Struct('<QQdHBxI')
+SEQ = struct.Struct('<Q')
+REFERENCED_OFFSET = 26
+PROBE = 8
+READ_RETRIES = 100
+NEVER = 0.0
+
+
+def key_hash(key):
+    """Ненулевой 64-битный хеш ключа: ноль означает пустой слот."""
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def is_expired(expires, now):
+    return expires != NEVER and expires <= now
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Бэкенд кэша Django поверх файла, отображённого в память.
+
+    LOCATION — путь к файлу; в OPTIONS можно задать SLOTS (число слотов)
+    и SLOT_SIZE (размер слота в байтах).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._slots = int(options.get('SLOTS', 2048))
+        self._slot_size = int(options.get('SLOT_SIZE', 64 * 1024))
+        self._capacity = self._slot_size - SLOT.size
+        self._size = HEADER_SIZE + self._slots * self._slot_size
+        self._header = HEADER.pack(MAGIC, self._slots, self._slot_size)
+        self._open_lock = threading.Lock()
+        self._pid = None
+
+    def _memory(self):
+        # После fork у потомка должен быть свой дескриптор: flock общего
+        # дескриптора не разделяет родителя и потомка.
+        if self._pid != os.getpid():
+            with self._open_lock:
+                if self._pid != os.getpid():
+                    self._open()
+        return self._map
+
+    def _open(self):
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            size = os.fstat(fd).st_size
+            if not size:
+                os.ftruncate(fd, self._size)
+                os.pwrite(fd, self._header, 0)
+            matches = (
+                os.fstat(fd).st_size == self._size
+                and os.pread(fd, HEADER.size, 0) == self._header
+            )
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        if not matches:
+            os.close(fd)
+            raise ImproperlyConfigured(
+                f'Файл кэша {self._path} размечен под другие SLOTS или '
+                'SLOT_SIZE; остановите сервер и удалите файл.'
+            )
+        self._fd = fd
+        self._map = mmap.mmap(fd, self._size)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def _writing(self):
+        memory = self._memory()
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield memory
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _window(self, hashed):
+        start = hashed % self._slots
+        return [
+            HEADER_SIZE + (start + i) % self._slots * self._slot_size
+            for i in range(PROBE)
+        ]
+
+    def _read(self, memory, offset, hashed, key):
+        """Значение из слота, если в нём живой ключ key; без блокировок."""
+        for _ in range(READ_RETRIES):
+            seq, slot_hash, expires, key_len, _, value_len = (
+                SLOT.unpack_from(memory, offset)
+            )
+            if seq % 2:
+                continue
+            start = offset + SLOT.size
+            stored_key = value = None
+            if slot_hash == hashed:
+                key_len = min(key_len, self._capacity)
+                value_len = min(value_len, self._capacity - key_len)
+                stored_key = memory[start:start + key_len]
+                value = memory[start + key_len:start + key_len + value_len]
+            if SEQ.unpack_from(memory, offset)[0] != seq:
+                continue
+            if stored_key != key or is_expired(expires, time.time()):
+                return None
+            memory[offset + REFERENCED_OFFSET] = 1
+            return value
+        return None
+
+    def _find(self, key):
+        memory = self._memory()
+        hashed = key_hash(key)
+        for offset in self._window(hashed):
+            value = self._read(memory, offset, hashed, key)
+            if value is not None:
+                return value
+        return None
+
+    def _lookup(self, memory, hashed, key):
+        """Слот ключа key в окне; вызывается под блокировкой записи."""
+        for offset in self._window(hashed):
+            _, slot_hash, _, key_len, _, _ = SLOT.unpack_from(memory, offset)
+            start = offset + SLOT.size
+            if slot_hash == hashed and memory[start:start + key_len] == key:
+                return offset
+        return None
+
+    def _is_alive(self, memory, offset):
+        expires = SLOT.unpack_from(memory, offset)[2]
+        return not is_expired(expires, time.time())
+
+    def _free_slot(self, memory, hashed):
+        """Пустой или просроченный слот окна, иначе вытесняемый по CLOCK."""
+        window = self._window(hashed)
+        now = time.time()
+        for offset in window:
+            slot_hash, expires = SLOT.unpack_from(memory, offset)[1:3]
+            if not slot_hash or is_expired(expires, now):
+                return offset
+        hand = HAND.unpack_from(memory, HAND_OFFSET)[0]
+        HAND.pack_into(memory, HAND_OFFSET, hand + 1)
+        window = window[hand % PROBE:] + window[:hand % PROBE]
+        for offset in window:
+            if not memory[offset + REFERENCED_OFFSET]:
+                return offset
+            memory[offset + REFERENCED_OFFSET] = 0
+        return window[0]
+
+    def _write(self, memory, offset, hashed, key, value, expires):
+        writing = SEQ.unpack_from(memory, offset)[0] | 1
+        SEQ.pack_into(memory, offset, writing)
+        SLOT.pack_into(
+            memory, offset,
+            writing, hashed, expires, len(key), 0, len(value)
+        )
+        start = offset + SLOT.size
+        memory[start:start + len(key) + len(value)] = key + value
+        SEQ.pack_into(memory, offset, writing + 1)
+
+    def _erase(self, memory, offset):
+        writing = SEQ.unpack_from(memory, offset)[0] | 1
+        SEQ.pack_into(memory, offset, writing)
+        SLOT.pack_into(memory, offset, writing, 0, NEVER, 0, 0, 0)
+        SEQ.pack_into(memory, offset, writing + 1)
+
+    def _store(self, key, value, timeout, only_new=False):
+        expires = self.get_backend_timeout(timeout)
+        expires = NEVER if expires is None else expires
+        key = key.encode()
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        hashed = key_hash(key)
+        with self._writing() as memory:
+            offset = self._lookup(memory, hashed, key)
+            if (
+                only_new
+                and offset is not None
+                and self._is_alive(memory, offset)
+            ):
+                return False
+            if len(key) + len(value) > self._capacity:
+                # Старое значение не должно пережить неудачную запись.
+                if offset is not None:
+                    self._erase(memory, offset)
+                return False
+            if offset is None:
+                offset = self._free_slot(memory, hashed)
+            self._write(memory, offset, hashed, key, value, expires)
+        return True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._store(key, value, timeout, only_new=True)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        value = self._find(key.encode())
+        if value is None:
+            return default
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._store(key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        expires = self.get_backend_timeout(timeout)
+        key = key.encode()
+        hashed = key_hash(key)
+        with self._writing() as memory:
+            offset = self._lookup(memory, hashed, key)
+            if offset is None or not self._is_alive(memory, offset):
+                return False
+            value = self._slot_value(memory, offset)
+            self._write(
+                memory, offset, hashed, key, value,
+                NEVER if expires is None else expires
+            )
+        return True
+
+    def _slot_value(self, memory, offset):
+        key_len, _, value_len = SLOT.unpack_from(memory, offset)[3:]
+        start = offset + SLOT.size + key_len
+        return memory[start:start + value_len]
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        key_bytes = key.encode()
+        hashed = key_hash(key_bytes)
+        with self._writing() as memory:
+            offset = self._lookup(memory, hashed, key_bytes)
+            if offset is None or not self._is_alive(memory, offset):
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(self._slot_value(memory, offset)) + delta
+            self._write(
+                memory, offset, hashed, key_bytes,
+                pickle.dumps(new_value, pickle.HIGHEST_PROTOCOL),
+                SLOT.unpack_from(memory, offset)[2]
+            )
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._find(key.encode()) is not None
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        key = key.encode()
+        with self._writing() as memory:
+            offset = self._lookup(memory, key_hash(key), key)
+            if offset is None:
+                return False
+            self._erase(memory, offset)
+        return True
+
+    def clear(self):
+        with self._writing() as memory:
+            for index in range(self._slots):
+                offset = HEADER_SIZE + index * self._slot_size
+                if SLOT.unpack_from(memory, offset)[1]:
+                    self._erase(memory, offset)
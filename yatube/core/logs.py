@@ -0,0 +1,25 @@
+"""
+Обработчик журнала для файлов в RUN_DIR.
+
+Журнал пишут все процессы сервера, поэтому его нельзя вращать из
+процесса, как RotatingFileHandler: при смене файла одни процессы
+продолжают писать в старый, другие теряют строки. WatchedFileHandler
+замечает, что файл переименовали внешней ротацией (logrotate), и
+открывает новый. Каталог создаётся с правами 0o700, файл — 0o600: в
+журнале бывают данные запросов пользователей.
+"""
+import os
+from logging.handlers import WatchedFileHandler
+
+
+class PrivateFileHandler(WatchedFileHandler):
+    def __init__(self, filename, **kwargs):
+        kwargs.setdefault('delay', True)
+        super().__init__(filename, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), 0o700, exist_ok=True)
+        fd = os.open(
+            self.baseFilename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600
+        )
+        return open(fd, 'a', encoding=self.encoding)
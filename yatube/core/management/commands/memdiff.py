@@ -0,0 +1,35 @@
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from core.profiling import IGNORED_FRAMES
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает два снимка памяти tracemalloc: что выросло.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('old')
+        parser.add_argument('new')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--group-by',
+            choices=('lineno', 'filename', 'traceback'),
+            default='lineno'
+        )
+
+    def handle(self, *args, **options):
+        old = tracemalloc.Snapshot.load(options['old'])
+        new = tracemalloc.Snapshot.load(options['new'])
+        stats = new.filter_traces(IGNORED_FRAMES).compare_to(
+            old.filter_traces(IGNORED_FRAMES), options['group_by']
+        )
+        total = sum(stat.size_diff for stat in stats)
+        self.stdout.write(self.style.SUCCESS(
+            f'Изменение памяти: {total / 1024:+.1f} КиБ'
+        ))
+        for stat in stats[:options['limit']]:
+            self.stdout.write(str(stat))
+            if options['group_by'] == 'traceback':
+                for line in stat.traceback.format():
+                    self.stdout.write(f'    {line}')
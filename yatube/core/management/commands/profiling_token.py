@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.profiling import MODES, make_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Выдаёт токен для параметра ?profile= или заголовка X-Profile, '
+        'чтобы профилировать запрос.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('mode', choices=MODES)
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token(options['mode']))
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import read_log, summarize
+
+
+class Command(BaseCommand):
+    help = 'Группирует журнал медленных запросов по форме запроса.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG)
+
+    def handle(self, *args, **options):
+        groups = summarize(read_log(options['log']))[:options['limit']]
+        for shape, group in groups:
+            views = ', '.join(sorted(map(str, group['views'])))
+            self.stdout.write(self.style.SUCCESS(
+                f'{group["count"]} раз, всего {group["total_ms"]:.1f} мс, '
+                f'максимум {group["max_ms"]:.1f} мс — {views}'
+            ))
+            self.stdout.write(f'  {shape}')
+            for line in group['plan']:
+                self.stdout.write(f'    {line}')
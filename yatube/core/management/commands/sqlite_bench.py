@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает конкурентную запись и чтение SQLite с настройками '
+        'SQLITE_PRAGMAS и без них.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            for title, pragmas in (
+                ('по умолчанию', {}),
+                ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS),
+            ):
+                result = benchmark(
+                    path,
+                    pragmas,
+                    options['writers'],
+                    options['readers'],
+                    options['duration']
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f'{title}: записей {result["writes"]:.0f}/с, '
+                    f'чтений {result["reads"]:.0f}/с, '
+                    f'ошибок блокировки {result["locked"]}'
+                ))
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.replicas import sync
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite во все реплики.'
+
+    def handle(self, *args, **options):
+        for alias in settings.DATABASE_REPLICAS:
+            sync(alias)
+            self.stdout.write(self.style.SUCCESS(f'{alias}: обновлена'))
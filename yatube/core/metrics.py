@@ -0,0 +1,205 @@
+"""
+Метрики процесса в текстовом формате Prometheus.
+
+Каждый процесс копит приращения счётчиков и гистограмм в памяти и не
+чаще раза в METRICS_FLUSH_INTERVAL секунд прибавляет их к общему файлу
+METRICS_FILE в RUN_DIR под блокировкой flock, поэтому /metrics
+показывает сумму по всем WSGI-процессам хоста и воркерам миниатюр.
+Образцы хранятся прямо под своими именами в формате Prometheus, например
+yatube_responses_total{status="200",view="posts:index"}, и слияние —
+простое сложение.
+"""
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .single_flight import EVENTS, stats
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FAMILIES = {
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа по имени URL'
+    ),
+    'yatube_responses_total': (
+        'counter', 'Ответы по имени URL и коду ответа'
+    ),
+    'yatube_thumbnail_seconds': (
+        'histogram', 'Время подготовки миниатюры и вариантов изображения'
+    ),
+    'yatube_cache_events_total': (
+        'counter', 'Исходы кэша core.single_flight'
+    ),
+    'yatube_cache_hit_ratio': (
+        'gauge', 'Доля запросов к кэшу, обошедшихся без сборки'
+    ),
+}
+SUFFIXES = ('_bucket', '_sum', '_count')
+LE = re.compile(r'le="([^"]*)",?')
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n'
+    )
+
+
+def sample(name, **labels):
+    if not labels:
+        return name
+    pairs = ','.join(
+        f'{key}="{escape(value)}"' for key, value in sorted(labels.items())
+    )
+    return f'{name}{{{pairs}}}'
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._flushed = time.monotonic()
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._pending[sample(name, **labels)] += amount
+
+    def observe(self, name, value, **labels):
+        """Добавляет значение value в гистограмму name."""
+        with self._lock:
+            for bound in BUCKETS:
+                if value <= bound:
+                    self._pending[
+                        sample(f'{name}_bucket', le=bound, **labels)
+                    ] += 1
+            self._pending[sample(f'{name}_bucket', le='+Inf', **labels)] += 1
+            self._pending[sample(f'{name}_sum', **labels)] += value
+            self._pending[sample(f'{name}_count', **labels)] += 1
+
+    def maybe_flush(self):
+        """Сбрасывает приращения в файл, если прошёл интервал."""
+        elapsed = time.monotonic() - self._flushed
+        if elapsed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Прибавляет накопленные приращения к общему файлу."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed = time.monotonic()
+        if not pending:
+            return
+        with open_shared(fcntl.LOCK_EX) as shared:
+            totals = load(shared)
+            totals.update(pending)
+            shared.seek(0)
+            shared.truncate()
+            json.dump(totals, shared)
+
+
+@contextmanager
+def open_shared(operation):
+    """
+    Общий файл метрик под блокировкой flock. Каталог и файл создаются
+    закрытыми от других пользователей: иначе они могли бы подложить в
+    /metrics свои ряды.
+    """
+    path = settings.METRICS_FILE
+    os.makedirs(os.path.dirname(path), 0o700, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+    with open(fd, 'a+', encoding='utf-8') as shared:
+        fcntl.flock(shared, operation)
+        try:
+            yield shared
+        finally:
+            fcntl.flock(shared, fcntl.LOCK_UN)
+
+
+def load(shared):
+    shared.seek(0)
+    try:
+        return Counter(json.load(shared))
+    except ValueError:
+        return Counter()
+
+
+def family(name):
+    base = name.split('{', 1)[0]
+    for suffix in SUFFIXES:
+        if base.endswith(suffix) and base[:-len(suffix)] in FAMILIES:
+            return base[:-len(suffix)]
+    return base
+
+
+def sort_key(name):
+    """
+    Порядок образцов: по метрике, набору меток без le и числовой границе
+    корзины, чтобы корзины шли по возрастанию и +Inf была последней.
+    """
+    base, _, labels = name.partition('{')
+    match = LE.search(labels)
+    bound = float(match.group(1)) if match else 0
+    return family(name), LE.sub('', labels), base, bound
+
+
+def render(samples):
+    """Образцы в текстовом формате Prometheus, сгруппированные по метрике."""
+    lines = []
+    current = None
+    for name in sorted(samples, key=sort_key):
+        metric = family(name)
+        if metric != current:
+            current = metric
+            if metric in FAMILIES:
+                kind, help_text = FAMILIES[metric]
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} {kind}')
+        lines.append(f'{name} {samples[name]}')
+    return '\n'.join(lines) + '\n'
+
+
+def collect():
+    """Сумма метрик всех процессов вместе с исходами кэша."""
+    registry.flush()
+    with open_shared(fcntl.LOCK_SH) as shared:
+        samples = load(shared)
+    events = stats()
+    for event in EVENTS:
+        samples[sample('yatube_cache_events_total', event=event)] = (
+            events[event]
+        )
+    served = events['hits'] + events['coalesced']
+    total = served + events['misses'] + events['refreshes']
+    samples['yatube_cache_hit_ratio'] = served / total if total else 0
+    return samples
+
+
+class MetricsMiddleware:
+    """Гистограмма времени ответа и счётчик кодов по имени URL."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        registry.observe(
+            'yatube_request_duration_seconds',
+            time.perf_counter() - start,
+            view=view
+        )
+        registry.inc(
+            'yatube_responses_total', view=view, status=response.status_code
+        )
+        registry.maybe_flush()
+        return response
+
+
+registry = Registry()
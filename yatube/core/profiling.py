@@ -0,0 +1,150 @@
+"""
+Профилирование отдельного запроса по требованию.
+
+Сотрудник добавляет к запросу параметр ?profile= или заголовок
+X-Profile с подписанным токеном режима (команда profiling_token):
+cpu — запрос выполняется под cProfile, memory — под tracemalloc.
+Результат сохраняется в закрытый каталог PROFILING_DIR в RUN_DIR (.prof
+для pstats и snakeviz, .snapshot для tracemalloc), а вместо страницы
+возвращается текстовая сводка: самые затратные функции или строки с
+наибольшими выделениями памяти за время запроса.
+
+Если процесс запущен с PYTHONTRACEMALLOC, снимок содержит всю память
+процесса, и два снимка одного воркера, сравненные командой memdiff,
+показывают утечки. Трассировка tracemalloc общая для процесса, поэтому
+её включает первый профилируемый запрос, а выключает последний — и
+только если её не включил кто-то другой.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+
+SALT = 'core.profiling'
+MODES = ('cpu', 'memory')
+IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+
+
+def make_token(mode):
+    """Подписанный токен режима профилирования."""
+    return signing.TimestampSigner(salt=SALT).sign(mode)
+
+
+def requested_mode(request):
+    """Режим из подписанного токена запроса или None."""
+    token = request.GET.get('profile') or request.META.get('HTTP_X_PROFILE')
+    if not token:
+        return None
+    try:
+        mode = signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    return mode if mode in MODES else None
+
+
+def output_path(request, extension):
+    # В профилях SQL и пути к исходникам: каталог только для владельца.
+    os.makedirs(settings.PROFILING_DIR, 0o700, exist_ok=True)
+    if os.stat(settings.PROFILING_DIR).st_uid != os.getuid():
+        raise ImproperlyConfigured(
+            f'Каталог {settings.PROFILING_DIR} принадлежит другому '
+            'пользователю'
+        )
+    slug = re.sub(r'[^\w-]+', '-', request.path).strip('-') or 'index'
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return os.path.join(
+        settings.PROFILING_DIR, f'{stamp}-{os.getpid()}-{slug}.{extension}'
+    )
+
+
+def profile_cpu(request, get_response):
+    profiler = cProfile.Profile()
+    response = profiler.runcall(get_response, request)
+    path = output_path(request, 'prof')
+    profiler.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats(
+        'cumulative'
+    ).print_stats(settings.PROFILING_TOP)
+    return response, path, summary.getvalue()
+
+
+class Tracer:
+    """Счётчик запросов, которым нужна трассировка tracemalloc."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._owned = False
+
+    @contextmanager
+    def tracing(self):
+        with self._lock:
+            if not self._users:
+                self._owned = not tracemalloc.is_tracing()
+                if self._owned:
+                    tracemalloc.start(settings.PROFILING_TRACEBACK_DEPTH)
+            self._users += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._users -= 1
+                if not self._users and self._owned:
+                    tracemalloc.stop()
+                    self._owned = False
+
+
+tracer = Tracer()
+
+
+def profile_memory(request, get_response):
+    with tracer.tracing():
+        before = tracemalloc.take_snapshot()
+        response = get_response(request)
+        after = tracemalloc.take_snapshot()
+    path = output_path(request, 'snapshot')
+    after.dump(path)
+    lines = [
+        str(stat) for stat in after.filter_traces(IGNORED_FRAMES).compare_to(
+            before.filter_traces(IGNORED_FRAMES), 'lineno'
+        )[:settings.PROFILING_TOP]
+    ]
+    return response, path, '\n'.join(lines) + '\n'
+
+
+class ProfilingMiddleware:
+    """Запускает запрос под профилировщиком по токену сотрудника."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not request.user.is_staff:
+            return self.get_response(request)
+        profile = profile_cpu if mode == 'cpu' else profile_memory
+        response, path, summary = profile(request, self.get_response)
+        report = HttpResponse(
+            f'{request.method} {request.get_full_path()} -> '
+            f'{response.status_code}\n{path}\n\n{summary}',
+            content_type='text/plain; charset=utf-8'
+        )
+        report['X-Profile-File'] = os.path.basename(path)
+        return report
@@ -0,0 +1,118 @@
+"""
+Чтение из реплик базы с привязкой к основной базе после записи.
+
+ReplicaRouter пишет всегда в основную базу, а читает из реплики только
+внутри представлений, помеченных replica_reads, и только в GET- и
+HEAD-запросах. Если пользователь недавно что-то записал,
+PrimaryPinMiddleware отмечает это в сессии, и следующие
+REPLICA_PIN_SECONDS секунд он читает из основной базы, чтобы сразу
+видеть свои изменения, даже если реплика отстаёт.
+
+Для локальной проверки реплики — копии файла SQLite, которые обновляет
+команда sync_replicas.
+"""
+import random
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_KEY = 'primary_until'
+
+state = threading.local()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return getattr(state, 'replica', None) or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же строки, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def pinned(request):
+    """Пользователь недавно писал и должен читать из основной базы."""
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(PIN_KEY, 0) > time.time()
+
+
+def resolve_user(request):
+    """
+    Читает ленивый request.user, пока реплика не выбрана: сессия и
+    пользователь должны браться из основной базы, а не из отстающей
+    реплики.
+    """
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_authenticated
+
+
+def replica_reads(view):
+    """Читает данные представления из случайной реплики."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        resolve_user(request)
+        if (
+            not settings.DATABASE_REPLICAS
+            or request.method not in ('GET', 'HEAD')
+            or pinned(request)
+        ):
+            return view(request, *args, **kwargs)
+        state.replica = random.choice(settings.DATABASE_REPLICAS)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.replica = None
+    return wrapper
+
+
+class PrimaryPinMiddleware:
+    """
+    После запроса, который что-то записал в базу, привязывает
+    пользователя к основной базе на REPLICA_PIN_SECONDS секунд.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state.wrote = False
+        response = self.get_response(request)
+        if (
+            state.wrote
+            and settings.DATABASE_REPLICAS
+            and request.user.is_authenticated
+        ):
+            request.session[PIN_KEY] = (
+                time.time() + settings.REPLICA_PIN_SECONDS
+            )
+        return response
+
+
+def sync(alias):
+    """Обновляет реплику alias копией основной базы."""
+    copy_primary(connections[alias].settings_dict['NAME'])
+
+
+def copy_primary(path):
+    """
+    Копирует основную базу SQLite в файл path через backup API, поэтому
+    копия согласована даже во время записи.
+    """
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        primary.connection.backup(target)
+    finally:
+        target.close()
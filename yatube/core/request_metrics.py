@@ -0,0 +1,183 @@
+"""
+Метрики запроса: SQL, шаблоны, кэш и заголовок Server-Timing.
+
+RequestMetricsMiddleware считает для каждого запроса число и время
+SQL-запросов (через execute_wrapper всех соединений), время отрисовки
+шаблонов без учёта SQL внутри них (шаблонный бэкенд DjangoTemplates
+этого модуля) и попадания в кэш core.single_flight. Итог уходит в
+заголовок Server-Timing.
+
+Одинаковые по форме запросы, повторённые NPLUSONE_THRESHOLD раз и
+больше, попадают в журнал как вероятный N+1 вместе с местом вызова.
+QUERY_BUDGETS задаёт предел числа запросов для представлений по их
+полному имени; превышение пишется в журнал, а при QUERY_BUDGET_STRICT
+(в тестах) поднимает QueryBudgetExceeded.
+"""
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger(__name__)
+
+state = threading.local()
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+CACHE_EVENTS = {
+    'hits': 'hits',
+    'stale': 'hits',
+    'waited': 'hits',
+    'misses': 'misses',
+    'refreshes': 'misses',
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Представление выполнило больше запросов, чем позволяет бюджет."""
+
+
+def fingerprint(sql):
+    """Форма запроса: списки IN (%s, ...) любой длины совпадают."""
+    return IN_LIST.sub('IN (...)', sql)
+
+
+def call_site():
+    """Ближайшая к запросу строка кода проекта."""
+    for frame in reversed(traceback.extract_stack()):
+        if (
+            frame.filename.startswith(settings.BASE_DIR)
+            and frame.filename != __file__
+        ):
+            path = os.path.relpath(frame.filename, settings.BASE_DIR)
+            return f'{path}:{frame.lineno} ({frame.name})'
+    return 'неизвестно'
+
+
+class Metrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache = Counter()
+        self.shapes = Counter()
+        self.repeated = {}
+
+    def execute(self, execute, sql, params, many, context):
+        """execute_wrapper: считает время и форму запроса."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            shape = fingerprint(sql)
+            self.shapes[shape] += 1
+            if self.shapes[shape] == settings.NPLUSONE_THRESHOLD:
+                self.repeated[shape] = call_site()
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} SQL"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hit {self.cache["hits"]}, '
+            f'miss {self.cache["misses"]}"',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+
+def current():
+    """Метрики текущего запроса или None вне запроса."""
+    return getattr(state, 'metrics', None)
+
+
+def count_cache(event):
+    """Учитывает исход core.single_flight в метриках запроса."""
+    metrics = current()
+    if metrics is not None and event in CACHE_EVENTS:
+        metrics.cache[CACHE_EVENTS[event]] += 1
+
+
+class TimedTemplate(django_backend.Template):
+    def render(self, context=None, request=None):
+        metrics = current()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        db_time = metrics.db_time
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += (
+                time.perf_counter() - start - (metrics.db_time - db_time)
+            )
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонный бэкенд Django, учитывающий время отрисовки."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+@contextmanager
+def wrap_connections(wrapper):
+    """Устанавливает execute_wrapper на все соединения с базами."""
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+        yield
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return f'{match.func.__module__}.{match.func.__name__}'
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = state.metrics = Metrics()
+        start = time.perf_counter()
+        try:
+            with wrap_connections(metrics.execute):
+                response = self.get_response(request)
+        finally:
+            state.metrics = None
+        response['Server-Timing'] = metrics.server_timing(
+            time.perf_counter() - start
+        )
+        self.report(request, metrics)
+        return response
+
+    def report(self, request, metrics):
+        name = view_name(request)
+        for shape, site in metrics.repeated.items():
+            logger.warning(
+                'Возможный N+1 в %s: %d одинаковых запросов из %s: %s',
+                name, metrics.shapes[shape], site, shape
+            )
+        budget = settings.QUERY_BUDGETS.get(name)
+        if budget is None or metrics.queries <= budget:
+            return
+        message = (
+            f'{name}: {metrics.queries} SQL-запросов при бюджете {budget}'
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,148 @@
+"""
+Кэширование с одной пересборкой (single flight) и выдачей устаревшего
+значения на время пересборки (stale-while-revalidate).
+
+Значение хранится вместе со сроком свежести и живёт в кэше ещё
+CACHE_STALE_GRACE секунд после него. Пересобирает устаревшее или
+отсутствующее значение только запрос, взявший блокировку cache.add;
+остальные в это время получают устаревшее значение, а если его нет —
+ждут результата до CACHE_REBUILD_TIMEOUT секунд. Счётчики исходов
+копятся в памяти процесса и не чаще раза в METRICS_FLUSH_INTERVAL секунд
+прибавляются к общим для всех процессов счётчикам в том же кэше: запись
+в общий кэш на каждое попадание упиралась бы в его блокировку.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .request_metrics import count_cache
+
+STATS_PREFIX = 'single_flight'
+EVENTS = ('hits', 'misses', 'refreshes', 'stale', 'waited')
+POLL_INTERVAL = 0.05
+
+
+def lock_key(key):
+    return f'{key}:rebuild'
+
+
+def acquire(key):
+    """Берёт право пересобрать значение; его получает один запрос."""
+    return cache.add(lock_key(key), 1, settings.CACHE_REBUILD_TIMEOUT)
+
+
+class Tally:
+    """Счётчики исходов процесса, ещё не прибавленные к общим."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._flushed = time.monotonic()
+
+    def inc(self, event):
+        with self._lock:
+            self._pending[event] += 1
+        if time.monotonic() - self._flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed = time.monotonic()
+        for event, count in pending.items():
+            key = f'{STATS_PREFIX}:{event}'
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                if not cache.add(key, count, None):
+                    cache.incr(key, count)
+
+
+tally = Tally()
+
+
+def record(event):
+    count_cache(event)
+    tally.inc(event)
+
+
+def stats():
+    """
+    Счётчики исходов: hits — свежее значение, misses — собрано заново,
+    refreshes — пересобрано устаревшее, stale — отдано устаревшее на
+    время чужой пересборки, waited — дождались чужой сборки. coalesced —
+    запросы, которым не пришлось собирать значение самим.
+    """
+    tally.flush()
+    found = cache.get_many([f'{STATS_PREFIX}:{event}' for event in EVENTS])
+    counters = {
+        event: found.get(f'{STATS_PREFIX}:{event}', 0) for event in EVENTS
+    }
+    counters['coalesced'] = counters['stale'] + counters['waited']
+    return counters
+
+
+def store(key, value, timeout, grace):
+    if timeout is None:
+        cache.set(key, (value, None), None)
+    else:
+        cache.set(key, (value, time.time() + timeout), timeout + grace)
+
+
+def rebuild(key, build, timeout, grace):
+    try:
+        value = build()
+        if value is not None:
+            store(key, value, timeout, grace)
+        return value
+    finally:
+        cache.delete(lock_key(key))
+
+
+def wait(key):
+    """Ждёт, пока чужая сборка положит значение в кэш."""
+    deadline = time.monotonic() + settings.CACHE_REBUILD_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if not cache.has_key(lock_key(key)):
+            break
+    return None
+
+
+def get_or_build(key, build, timeout, grace=None):
+    """
+    Значение по ключу key, при необходимости собранное вызовом build()
+    и закэшированное на timeout секунд. Если build() вернул None,
+    результат не кэшируется.
+    """
+    if grace is None:
+        grace = settings.CACHE_STALE_GRACE
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if fresh_until is None or time.time() < fresh_until:
+            record('hits')
+            return value
+        if not acquire(key):
+            record('stale')
+            return value
+        record('refreshes')
+        return rebuild(key, build, timeout, grace)
+    if acquire(key):
+        record('misses')
+        return rebuild(key, build, timeout, grace)
+    value = wait(key)
+    if value is not None:
+        record('waited')
+        return value
+    record('misses')
+    value = build()
+    if value is not None:
+        store(key, value, timeout, grace)
+    return value
@@ -0,0 +1,122 @@
+"""
+Журнал медленных SQL-запросов с планом выполнения.
+
+SlowQueryMiddleware через execute_wrapper замечает запросы дольше
+SLOW_QUERY_THRESHOLD секунд и пишет в логгер core.slow_queries строку
+JSON: SQL, параметры, представление, путь, длительность и вывод EXPLAIN
+QUERY PLAN. Строковые параметры, в которых бывают ключи сессий и адреса
+почты, заменяются типом и длиной, если не включить
+SLOW_QUERY_LOG_PARAMS. В settings.LOGGING логгер направлен в файл
+SLOW_QUERY_LOG в RUN_DIR (core.logs), общий для процессов и вращаемый
+внешне; команда slowqueries группирует записи по форме запроса.
+"""
+import glob
+import json
+import logging
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .request_metrics import fingerprint, view_name, wrap_connections
+
+logger = logging.getLogger(__name__)
+
+
+def explain(connection, sql, params):
+    """
+    Строки плана запроса или текст ошибки, если план не получить.
+
+    EXPLAIN выполняется курсором драйвера в обход execute_wrapper, чтобы
+    RequestMetrics не засчитывал его в запросы и бюджет представления.
+    """
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else (
+        'EXPLAIN'
+    )
+    try:
+        with connection.wrap_database_errors:
+            cursor = connection.create_cursor()
+            try:
+                cursor.execute(f'{prefix} {sql}', params)
+                return [str(row[-1]) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+    except DatabaseError as error:
+        return [f'EXPLAIN не выполнен: {error}']
+
+
+def redact(params):
+    """Параметры без значений строк: числа, None и bool остаются."""
+    return [
+        param if param is None or isinstance(param, (bool, int, float))
+        else f'<{type(param).__name__}:{len(str(param))}>'
+        for param in params or ()
+    ]
+
+
+def record(request, connection, sql, params, duration):
+    logger.warning(json.dumps({
+        'time': timezone.now().isoformat(),
+        'duration_ms': round(duration * 1000, 1),
+        'view': view_name(request),
+        'path': request.path,
+        'sql': sql,
+        'params': (
+            params if settings.SLOW_QUERY_LOG_PARAMS else redact(params)
+        ),
+        'plan': explain(connection, sql, params),
+    }, ensure_ascii=False, default=str))
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        def log_slow(execute, sql, params, many, context):
+            start = time.perf_counter()
+            result = execute(sql, params, many, context)
+            duration = time.perf_counter() - start
+            if duration >= settings.SLOW_QUERY_THRESHOLD and not many:
+                record(request, context['connection'], sql, params, duration)
+            return result
+
+        with wrap_connections(log_slow):
+            return self.get_response(request)
+
+
+def read_log(path):
+    """Записи журнала path и его вращённых копий path.1, path.2, ..."""
+    for name in sorted(glob.glob(f'{glob.escape(path)}*')):
+        with open(name, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries):
+    """
+    Группы записей по форме запроса от самой затратной по общему
+    времени: число, общее и наибольшее время, представления и план
+    самого медленного запроса.
+    """
+    groups = defaultdict(lambda: {
+        'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'views': set(),
+    })
+    for entry in entries:
+        group = groups[fingerprint(entry['sql'])]
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['views'].add(entry['view'])
+        if entry['duration_ms'] >= group['max_ms']:
+            group['max_ms'] = entry['duration_ms']
+            group['plan'] = entry['plan']
+    return sorted(
+        groups.items(),
+        key=lambda item: item[1]['total_ms'],
+        reverse=True
+    )
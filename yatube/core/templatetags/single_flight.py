@@ -0,0 +1,48 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.cache import CacheNode
+
+from core.single_flight import get_or_build
+
+register = template.Library()
+
+
+class SingleFlightCacheNode(CacheNode):
+    def render(self, context):
+        try:
+            timeout = self.expire_time_var.resolve(context)
+        except template.VariableDoesNotExist:
+            raise template.TemplateSyntaxError(
+                f'"single_flight_cache" tag got an unknown variable: '
+                f'{self.expire_time_var.var!r}'
+            )
+        if timeout is not None:
+            timeout = int(timeout)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_build(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            timeout
+        )
+
+
+@register.tag
+def single_flight_cache(parser, token):
+    """
+    Как {% cache timeout name vary... %}, но устаревший фрагмент
+    пересобирает только один запрос, а остальные получают прежний.
+    """
+    nodelist = parser.parse(('endsingle_flight_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.'
+        )
+    return SingleFlightCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+        None
+    )
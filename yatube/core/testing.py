@@ -0,0 +1,52 @@
+"""
+Окружение для прогона тестов.
+
+Тесты чистят кэш и пишут метрики, поэтому работают со своими временными
+файлами, а не с файлами запущенного рядом сервера, и не мешают друг
+другу при параллельных прогонах. Превышение QUERY_BUDGETS в тестах — ошибка.
+Для manage.py test окружение включает TestRunner (settings.TEST_RUNNER),
+для pytest — фикстура в tests/conftest.py.
+"""
+import copy
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def isolated_settings():
+    """
+    Настройки тестов: кэши и файл метрик во временном каталоге прогона
+    и строгие бюджеты запросов.
+    """
+    directory = tempfile.mkdtemp(prefix='yatube-test-')
+    caches = copy.deepcopy(settings.CACHES)
+    for alias, options in caches.items():
+        options['LOCATION'] = os.path.join(directory, f'{alias}.cache')
+    try:
+        with override_settings(
+            CACHES=caches,
+            METRICS_FILE=os.path.join(directory, 'metrics.json'),
+            QUERY_BUDGET_STRICT=True
+        ):
+            yield
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner, который включает isolated_settings() на весь прогон."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._settings = isolated_settings()
+        self._settings.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self._settings.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import (
+    BUCKETS, Registry, collect, registry, render, sample
+)
+from posts.models import User
+
+METRICS_DIR = tempfile.mkdtemp()
+METRICS_FILE = os.path.join(METRICS_DIR, 'metrics.json')
+
+
+@override_settings(METRICS_FILE=METRICS_FILE, METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        # Приращения прошлых тестов не должны попасть в проверки.
+        registry.flush()
+        if os.path.exists(METRICS_FILE):
+            os.remove(METRICS_FILE)
+        self.client = Client()
+
+    def test_shared_file_is_private(self):
+        """Общий файл метрик закрыт от других пользователей машины."""
+        registry.inc('yatube_responses_total', view='test', status=200)
+        registry.flush()
+        self.assertEqual(os.stat(METRICS_FILE).st_mode & 0o777, 0o600)
+
+    def test_request_histogram(self):
+        """Время ответа и коды учитываются по имени URL."""
+        self.client.get(reverse('posts:index'))
+        text = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        ).content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram', text)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{le="+Inf",view="posts:index"} 1',
+            text
+        )
+        self.assertIn(
+            'yatube_responses_total{status="200",view="posts:index"} 1', text
+        )
+        self.assertIn('yatube_cache_hit_ratio', text)
+
+    def test_processes_are_merged(self):
+        """Приращения разных процессов складываются в общем файле."""
+        for value in (0.2, 3):
+            worker = Registry()
+            worker.observe('yatube_thumbnail_seconds', value)
+            worker.flush()
+        samples = collect()
+        self.assertEqual(
+            samples[sample('yatube_thumbnail_seconds_count')], 2
+        )
+        self.assertEqual(
+            samples[sample('yatube_thumbnail_seconds_bucket', le=0.25)], 1
+        )
+        self.assertEqual(samples[sample('yatube_thumbnail_seconds_sum')], 3.2)
+
+    def test_endpoint_is_protected(self):
+        """Метрики видны только сотрудникам и по токену."""
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_AUTHORIZATION='Bearer wrong'
+            ).status_code,
+            403
+        )
+        self.client.force_login(
+            User.objects.create(username='admin', is_staff=True)
+        )
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_render_format(self):
+        """Образцы одной метрики идут под общими HELP и TYPE."""
+        text = render({
+            sample('yatube_responses_total', view='a', status=200): 2,
+            sample('yatube_responses_total', view='b', status=404): 1,
+        })
+        self.assertEqual(text.count('# TYPE yatube_responses_total'), 1)
+        self.assertIn('view="b"} 1\n', text)
+
+    def test_buckets_in_numeric_order(self):
+        """Корзины гистограммы идут по возрастанию, +Inf — последней."""
+        local = Registry()
+        for value in (0.2, 3, 20):
+            local.observe('yatube_request_duration_seconds', value, view='a')
+        text = render(local._pending)
+        bounds = [
+            line.split('le="')[1].split('"')[0]
+            for line in text.splitlines() if '_bucket{' in line
+        ]
+        self.assertEqual(
+            bounds,
+            [str(bound) for bound in BUCKETS if bound >= 0.2] + ['+Inf']
+        )
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import tracemalloc
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.profiling import Tracer, make_token
+from posts.models import User
+
+PROFILING_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILING_DIR=PROFILING_DIR)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(ProfilingTests.staff)
+
+    def test_cpu_profile(self):
+        """По токену cpu запрос профилируется cProfile."""
+        response = self.client.get(
+            reverse('posts:index'), {'profile': make_token('cpu')}
+        )
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertContains(response, 'function calls')
+        path = os.path.join(PROFILING_DIR, response['X-Profile-File'])
+        self.assertTrue(path.endswith('.prof'))
+        self.assertTrue(os.path.exists(path))
+
+    def test_profiles_directory_is_private(self):
+        """Каталог профилей создаётся доступным только владельцу."""
+        directory = os.path.join(PROFILING_DIR, 'private')
+        with override_settings(PROFILING_DIR=directory):
+            self.client.get(
+                reverse('posts:index'), {'profile': make_token('cpu')}
+            )
+        self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+
+    def test_memory_profile(self):
+        """По токену memory в заголовке сохраняется снимок памяти."""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_X_PROFILE=make_token('memory')
+        )
+        self.assertContains(response, '-> 200')
+        path = os.path.join(PROFILING_DIR, response['X-Profile-File'])
+        self.assertIsInstance(
+            tracemalloc.Snapshot.load(path), tracemalloc.Snapshot
+        )
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_tracer_shared_between_requests(self):
+        """
+        Трассировку выключает последний запрос и только ту, которую
+        включил сам.
+        """
+        tracer = Tracer()
+        with tracer.tracing():
+            with tracer.tracing():
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+            tracemalloc.take_snapshot()
+        self.assertFalse(tracemalloc.is_tracing())
+        tracemalloc.start()
+        try:
+            with tracer.tracing():
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_requires_staff_and_signature(self):
+        """Без подписи или не сотруднику страница отдаётся как обычно."""
+        url = reverse('posts:index')
+        cases = {
+            'подделанный токен': (self.client, {'profile': 'cpu'}),
+            'не сотрудник': (Client(), {'profile': make_token('cpu')}),
+        }
+        for name, (client, params) in cases.items():
+            with self.subTest(name=name):
+                response = client.get(url, params)
+                self.assertNotIn('X-Profile-File', response)
+                self.assertIn('text/html', response['Content-Type'])
+
+    def test_memdiff(self):
+        """memdiff показывает выросшие выделения между снимками."""
+        tracemalloc.start()
+        try:
+            old = tracemalloc.take_snapshot()
+            leak = [object() for _ in range(10000)]
+            new = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        paths = []
+        for number, snapshot in enumerate((old, new)):
+            paths.append(os.path.join(PROFILING_DIR, f'{number}.snapshot'))
+            snapshot.dump(paths[-1])
+        out = StringIO()
+        call_command('memdiff', *paths, stdout=out)
+        self.assertIn('test_profiling.py', out.getvalue())
+        self.assertTrue(leak)
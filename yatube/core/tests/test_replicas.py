@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import replicas
+from posts.models import Group, Post, User
+
+
+@replicas.replica_reads
+def read_alias(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_writes_go_to_primary(self):
+        """Запись всегда идёт в основную базу."""
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_replica_reads(self):
+        """Помеченные представления читают из реплики только в GET."""
+        request = self.factory.get('/')
+        request.session = {}
+        self.assertEqual(read_alias(request).content, b'replica1')
+        self.assertEqual(router.db_for_read(Post), 'default')
+        request = self.factory.post('/')
+        request.session = {}
+        self.assertEqual(read_alias(request).content, b'default')
+
+    def test_pinned_user_reads_primary(self):
+        """После записи пользователь читает из основной базы."""
+        user = User.objects.create(username='author')
+        client = Client()
+        client.force_login(user)
+        client.post(reverse('posts:new_post'), {'text': 'Новая запись'})
+        self.assertIn(replicas.PIN_KEY, client.session)
+        # Реплики replica1 нет: чтение из неё закончилось бы ошибкой.
+        response = client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новая запись')
+
+    def test_reads_do_not_pin(self):
+        """
+        Чтение лент не привязывает к основной базе и идёт в реплику, а
+        пользователь запроса читается из основной базы.
+        """
+        author = User.objects.create(username='author')
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(text='Запись', author=author, group=group)
+        client = Client()
+        client.force_login(User.objects.create(username='reader'))
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=[group.slug]),
+            reverse('posts:profile', args=[author.username]),
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                reads = []
+
+                def db_for_read(router, model, **hints):
+                    replica = getattr(replicas.state, 'replica', None)
+                    reads.append((model, replica))
+                    # Реплики replica1 нет: читаем из основной базы.
+                    return 'default'
+
+                with mock.patch.object(
+                    replicas.ReplicaRouter, 'db_for_read', db_for_read
+                ):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(replicas.PIN_KEY, client.session)
+                self.assertIn((Post, 'replica1'), reads)
+                # Первое чтение User — пользователь запроса.
+                self.assertEqual(
+                    next(alias for model, alias in reads if model is User),
+                    None
+                )
+
+
+class CopyPrimaryTests(TestCase):
+    def test_copy_primary(self):
+        """Копия основной базы содержит её таблицы."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            replicas.copy_primary(path)
+            with sqlite3.connect(path) as copy:
+                tables = {
+                    row[0] for row in copy.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'table'"
+                    )
+                }
+        self.assertIn(Post._meta.db_table, tables)
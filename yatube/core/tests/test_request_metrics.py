@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, TestCase, override_settings
+from django.urls import path, reverse
+
+from core.request_metrics import QueryBudgetExceeded, fingerprint
+from posts.models import Post, User
+
+
+def authors(request):
+    return HttpResponse(
+        ', '.join(post.author.username for post in Post.objects.all())
+    )
+
+
+urlpatterns = [path('authors/', authors)]
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(text='Запись', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_server_timing(self):
+        """Ответ содержит время SQL, шаблонов, итог и исходы кэша."""
+        timing = self.client.get(reverse('posts:index'))['Server-Timing']
+        for part in ('db;dur=', 'SQL"', 'tpl;dur=', 'cache;desc=', 'total'):
+            with self.subTest(part=part):
+                self.assertIn(part, timing)
+        self.assertIn('hit 0', timing)
+        timing = self.client.get(reverse('posts:index'))['Server-Timing']
+        self.assertIn('hit 1, miss 0', timing)
+        self.assertIn('desc="0 SQL"', timing)
+
+    @override_settings(QUERY_BUDGETS={'posts.views.index': 0})
+    def test_budget_exceeded(self):
+        """Превышение бюджета запросов в тестах — ошибка."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('posts:index'))
+
+    @override_settings(
+        QUERY_BUDGETS={'posts.views.index': 0}, QUERY_BUDGET_STRICT=False
+    )
+    def test_budget_warning(self):
+        """Вне тестов превышение бюджета пишется в журнал."""
+        with self.assertLogs('core.request_metrics', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('posts.views.index', logs.output[0])
+
+    @override_settings(NPLUSONE_THRESHOLD=3, ROOT_URLCONF=__name__)
+    def test_n_plus_one(self):
+        """Повторяющиеся запросы попадают в журнал с местом вызова."""
+        for number in range(3):
+            Post.objects.create(
+                text=f'Запись {number}',
+                author=User.objects.create(username=f'user{number}')
+            )
+        with self.assertLogs('core.request_metrics', 'WARNING') as logs:
+            self.client.get('/authors/')
+        self.assertIn('N+1', logs.output[0])
+        self.assertIn('core/tests/test_request_metrics.py', logs.output[0])
+
+    def test_fingerprint(self):
+        """Списки IN разной длины дают одну форму запроса."""
+        self.assertEqual(
+            fingerprint('WHERE id IN (%s, %s, %s)'),
+            fingerprint('WHERE id IN (%s)')
+        )
@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from core.cache_backends.shared_memory import PROBE, SharedMemoryCache
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+INCREMENTS = 200
+
+
+def make_cache(path, slots=64, slot_size=1024):
+    return SharedMemoryCache(
+        path, {'OPTIONS': {'SLOTS': slots, 'SLOT_SIZE': slot_size}}
+    )
+
+
+def increment(path):
+    cache = make_cache(path)
+    for _ in range(INCREMENTS):
+        cache.incr('counter')
+
+
+class SharedMemoryCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache')
+        self.cache = make_cache(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_django_cache_api(self):
+        """Бэкенд поддерживает основные операции кэша Django."""
+        cache = self.cache
+        cache.set('key', {'value': [1, 2]})
+        self.assertEqual(cache.get('key'), {'value': [1, 2]})
+        self.assertIsNone(cache.get('missing'))
+        self.assertFalse(cache.add('key', 'other'))
+        self.assertTrue(cache.add('new', 'value'))
+        self.assertEqual(cache.get_many(['key', 'new', 'missing']), {
+            'key': {'value': [1, 2]}, 'new': 'value'
+        })
+        cache.set('number', 1)
+        self.assertEqual(cache.incr('number', 5), 6)
+        self.assertEqual(cache.decr('number'), 5)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+        self.assertTrue(cache.has_key('number'))
+        cache.delete('number')
+        self.assertFalse(cache.has_key('number'))
+        cache.set('versioned', 1, version=2)
+        self.assertIsNone(cache.get('versioned'))
+        self.assertEqual(cache.get('versioned', version=2), 1)
+        cache.clear()
+        self.assertIsNone(cache.get('key'))
+
+    def test_expiration(self):
+        """Записи с истёкшим сроком не отдаются, touch продлевает срок."""
+        self.cache.set('short', 'value', 0.05)
+        self.cache.set('touched', 'value', 0.05)
+        self.assertTrue(self.cache.touch('touched', None))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 'again'))
+        self.assertEqual(self.cache.get('touched'), 'value')
+
+    def test_oversized_value_replaces_old_one(self):
+        """Слишком большое значение не кэшируется и сбрасывает старое."""
+        self.cache.set('key', 'small')
+        self.cache.set('key', 'x' * 2048)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_other_geometry_is_refused(self):
+        """Файл с другой разметкой не усекается, а отвергается."""
+        self.cache.set('key', 'value')
+        size = os.path.getsize(self.path)
+        with self.assertRaises(ImproperlyConfigured):
+            make_cache(self.path, slots=32).get('key')
+        self.assertEqual(os.path.getsize(self.path), size)
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_clock_eviction_keeps_recently_read(self):
+        """При вытеснении недавно прочитанные записи остаются."""
+        cache = make_cache(self.path, slots=PROBE)
+        for number in range(PROBE):
+            cache.set(f'key{number}', number)
+        for _ in range(PROBE):
+            cache.get('key0')
+            cache.set(f'new{_}', _)
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertEqual(cache.get(f'new{PROBE - 1}'), PROBE - 1)
+
+    def test_shared_between_processes(self):
+        """Процессы видят записи друг друга, incr атомарен."""
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(self.path,))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        increment(self.path)
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 5 * INCREMENTS)
+
+    def test_forked_child_uses_own_lock(self):
+        """После fork потомок открывает файл заново."""
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        child = context.Process(target=self.cache.incr, args=('counter',))
+        child.start()
+        child.join()
+        self.assertEqual(self.cache.get('counter'), 1)
+
+
+class TestCacheLocationTests(SimpleTestCase):
+    def test_tests_use_their_own_cache_file(self):
+        """Тесты работают со своим файлом кэша, а не с файлом сервера."""
+        path = caches['default']._path
+        self.assertFalse(path.startswith(settings.RUN_DIR))
+        self.assertTrue(path.startswith(tempfile.gettempdir()))
@@ -0,0 +1,89 @@
+import threading
+import time
+from unittest import mock
+
+from core import single_flight
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+KEY = 'single-flight-test'
+
+
+@override_settings(CACHE_STALE_GRACE=60, CACHE_REBUILD_TIMEOUT=2)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        single_flight.tally.flush()
+        cache.clear()
+        self.builds = 0
+
+    def build(self, value='value', delay=0):
+        def build():
+            self.builds += 1
+            time.sleep(delay)
+            return value
+        return build
+
+    def make_stale(self):
+        cache.set(KEY, ('stale', time.time() - 1), 60)
+
+    def test_builds_once_then_hits(self):
+        """Значение собирается один раз, дальше берётся из кэша."""
+        for _ in range(3):
+            self.assertEqual(
+                single_flight.get_or_build(KEY, self.build(), 60), 'value'
+            )
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(single_flight.stats()['hits'], 2)
+
+    @override_settings(METRICS_FLUSH_INTERVAL=60)
+    def test_hits_do_not_write_shared_counters(self):
+        """Попадания считаются в памяти процесса, без записи в кэш."""
+        single_flight.get_or_build(KEY, self.build(), 60)
+        single_flight.tally.flush()
+        with mock.patch.object(cache, 'incr') as incr:
+            for _ in range(5):
+                single_flight.get_or_build(KEY, self.build(), 60)
+        incr.assert_not_called()
+        self.assertEqual(single_flight.stats()['hits'], 5)
+
+    def test_stale_value_while_other_rebuilds(self):
+        """Пока другой запрос пересобирает, отдаётся устаревшее значение."""
+        self.make_stale()
+        single_flight.acquire(KEY)
+        self.assertEqual(
+            single_flight.get_or_build(KEY, self.build(), 60), 'stale'
+        )
+        self.assertEqual(self.builds, 0)
+        self.assertEqual(single_flight.stats()['coalesced'], 1)
+
+    def test_stale_value_is_refreshed(self):
+        """Устаревшее значение пересобирает первый пришедший запрос."""
+        self.make_stale()
+        self.assertEqual(
+            single_flight.get_or_build(KEY, self.build(), 60), 'value'
+        )
+        self.assertEqual(single_flight.stats()['refreshes'], 1)
+
+    def test_none_is_not_cached(self):
+        """Результат None не кэшируется."""
+        single_flight.get_or_build(KEY, self.build(None), 60)
+        single_flight.get_or_build(KEY, self.build(None), 60)
+        self.assertEqual(self.builds, 2)
+
+    def test_concurrent_misses_build_once(self):
+        """Одновременные промахи собирают значение один раз."""
+        results = []
+
+        def request():
+            results.append(
+                single_flight.get_or_build(KEY, self.build(delay=0.2), 60)
+            )
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(single_flight.stats()['waited'], 7)
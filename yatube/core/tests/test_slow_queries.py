@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.logs import PrivateFileHandler
+from core.slow_queries import summarize
+from posts.models import Post, User
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Post.objects.create(
+            text='Запись', author=User.objects.create(username='author')
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_slow_queries_logged_with_plan(self):
+        """Медленный запрос пишется с SQL, представлением и планом."""
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            Client().get(reverse('posts:api_posts'), {'fields': 'id'})
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['view'], 'posts.api.posts')
+        self.assertIn('posts_post', entry['sql'])
+        self.assertIn('params', entry)
+        self.assertTrue(entry['plan'])
+
+    def test_explain_is_not_counted(self):
+        """EXPLAIN не засчитывается в число SQL-запросов представления."""
+        queries = []
+        for threshold in (60, 0):
+            with override_settings(SLOW_QUERY_THRESHOLD=threshold):
+                with mock.patch('core.slow_queries.logger'):
+                    response = Client().get(
+                        reverse('posts:api_posts'), {'fields': 'id'}
+                    )
+            db_timing = response['Server-Timing'].split(',')[0]
+            queries.append(db_timing.split('desc=')[1])
+        self.assertEqual(queries[0], queries[1])
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_string_params_are_redacted(self):
+        """Строковые параметры скрыты, пока их явно не включили."""
+        user = User.objects.get()
+        client = Client()
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            client.get(reverse('posts:profile', args=[user.username]))
+        params = [
+            param
+            for record in logs.records
+            for param in json.loads(record.getMessage())['params']
+        ]
+        self.assertNotIn(user.username, params)
+        self.assertIn(f'<str:{len(user.username)}>', params)
+        with override_settings(SLOW_QUERY_LOG_PARAMS=True):
+            with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+                client.get(reverse('posts:profile', args=[user.username]))
+        self.assertIn(user.username, ''.join(logs.output))
+
+    def test_log_file_is_private(self):
+        """Файл журнала и его каталог закрыты от других пользователей."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run', 'slow.jsonl')
+            handler = PrivateFileHandler(path, encoding='utf-8')
+            handler.emit(logging.makeLogRecord({'msg': 'строка'}))
+            handler.close()
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+            self.assertEqual(
+                os.stat(os.path.dirname(path)).st_mode & 0o777, 0o700
+            )
+
+    def test_fast_queries_not_logged(self):
+        """Быстрые запросы в журнал не попадают."""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('core.slow_queries', 'WARNING'):
+                Client().get(reverse('posts:api_posts'))
+
+    def test_summarize_groups_by_shape(self):
+        """Записи группируются по форме запроса."""
+        entries = [
+            {
+                'sql': 'SELECT 1 WHERE id IN (%s, %s)', 'duration_ms': 5.0,
+                'view': 'a', 'plan': ['SCAN a'],
+            },
+            {
+                'sql': 'SELECT 1 WHERE id IN (%s)', 'duration_ms': 7.0,
+                'view': 'b', 'plan': ['SCAN b'],
+            },
+            {
+                'sql': 'SELECT 2', 'duration_ms': 1.0,
+                'view': 'a', 'plan': [],
+            },
+        ]
+        (shape, group), other = summarize(entries)
+        self.assertEqual(shape, 'SELECT 1 WHERE id IN (...)')
+        self.assertEqual(group['count'], 2)
+        self.assertEqual(group['total_ms'], 12.0)
+        self.assertEqual(group['plan'], ['SCAN b'])
+        self.assertEqual(group['views'], {'a', 'b'})
+
+    def test_slowqueries_command(self):
+        """Команда читает журнал вместе с вращёнными копиями."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow.jsonl')
+            for name in (path, f'{path}.1'):
+                with open(name, 'w', encoding='utf-8') as log:
+                    log.write(json.dumps({
+                        'sql': 'SELECT 1', 'duration_ms': 150.0,
+                        'view': 'posts.views.index', 'plan': ['SCAN post'],
+                    }) + '\n')
+            out = StringIO()
+            call_command('slowqueries', log=path, stdout=out)
+        self.assertIn('2 раз', out.getvalue())
+        self.assertIn('SCAN post', out.getvalue())
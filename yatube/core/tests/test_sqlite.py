@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import sqlite
+
+
+class TuneConnectionTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234})
+    def test_pragmas_applied(self):
+        """Обработчик connection_created применяет SQLITE_PRAGMAS."""
+        sqlite.tune_connection(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 1234)
+
+
+class BenchmarkTests(SimpleTestCase):
+    def test_benchmark_counts_operations(self):
+        """Бенчмарк пишет и читает из нескольких потоков."""
+        with tempfile.TemporaryDirectory() as directory:
+            result = sqlite.benchmark(
+                os.path.join(directory, 'bench.sqlite3'),
+                {'journal_mode': 'wal', 'synchronous': 'normal'},
+                writers=2,
+                readers=2,
+                duration=0.2
+            )
+        self.assertGreater(result['writes'], 0)
+        self.assertGreater(result['reads'], 0)
+        self.assertEqual(result['locked'], 0)
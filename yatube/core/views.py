@@ -0,0 +1,23 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .metrics import collect, render
+
+
+def metrics(request):
+    """
+    Метрики в формате Prometheus: для сотрудников или по заголовку
+    Authorization: Bearer METRICS_TOKEN.
+    """
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    authorized = request.user.is_staff or bool(token) and hmac.compare_digest(
+        header.encode(), f'Bearer {token}'.encode()
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(collect()), content_type='text/plain; version=0.0.4'
+    )
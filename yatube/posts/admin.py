@@ -1,15 +1,30 @@
 from django.contrib import admin
 from django.contrib.admin.options import ModelAdmin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 ModelAdmin.empty_value_display = '-пусто-'
 
 
+class FullTextSearchMixin:
+    """Поиск в админке по полнотекстовому индексу вместо LIKE."""
+    search_table = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = search.matching_ids(self.search_table, search_term)
+        if ids is None:
+            return queryset.none(), False
+        return queryset.filter(pk__in=ids), False
+
+
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     search_fields = ('text',)
+    search_table = search.POST_TABLE
     list_filter = ('pub_date',)
 
 
@@ -22,9 +37,10 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'post', 'author', 'text', 'created')
     search_fields = ('text',)
+    search_table = search.COMMENT_TABLE
     list_filter = ('created',)
 
 
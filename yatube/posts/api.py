@@ -0,0 +1,281 @@
+"""
+JSON API только для чтения: записи, сообщества, профили, комментарии и
+подписки.
+
+Строки читаются через values() и сериализуются как есть, без создания
+объектов моделей. Параметр fields= выбирает поля ответа, и в запрос
+попадают только нужные столбцы и JOIN. Списки листаются по курсору
+after= без OFFSET, ids= возвращает объекты по списку id одним запросом.
+ETag считается по телу ответа, на повторный запрос с тем же
+If-None-Match отвечаем 304.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+from .models import Comment, Follow, Group, Post, User
+from .paginator import decode_cursor, make_cursor
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+GROUP_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+}
+PROFILE_FIELDS = {
+    'id': 'id',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'followers': 'counters__followers',
+    'following': 'counters__following',
+    'posts': 'counters__posts',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+FOLLOW_FIELDS = {
+    'id': 'id',
+    'user': 'user__username',
+    'author': 'author__username',
+}
+POST_KEY = ('pub_date', 'id')
+COMMENT_KEY = ('created', 'id')
+ID_KEY = (None, 'id')
+
+
+class ApiError(ValueError):
+    """Некорректные параметры запроса к API."""
+
+
+def api_view(view):
+    """
+    Превращает словарь, который вернуло представление, в JSON-ответ с
+    ETag; ApiError и Http404 становятся ответами 400 и 404.
+    """
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        except Http404:
+            return JsonResponse({'error': 'Не найдено'}, status=404)
+        body = json.dumps(
+            data, cls=DjangoJSONEncoder, ensure_ascii=False
+        ).encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        return get_conditional_response(
+            request, etag=etag, response=response
+        )
+    return wrapper
+
+
+def select(request, fields):
+    """Пары (имя, поле ORM) из параметра fields= или все поля."""
+    names = request.GET.get('fields')
+    if not names:
+        return list(fields.items())
+    selected = []
+    for name in names.split(','):
+        if name not in fields:
+            raise ApiError(f'Неизвестное поле: {name}')
+        selected.append((name, fields[name]))
+    return selected
+
+
+def rows(queryset, selected, extra=()):
+    """
+    Строки values() с нужными столбцами; extra — поля, которые нужны
+    для курсора, но в ответ не попадают.
+    """
+    lookups = {lookup for _, lookup in selected}
+    return queryset.values(*lookups.union(extra))
+
+
+def serialize(row, selected):
+    data = {name: row[lookup] for name, lookup in selected}
+    if 'image' in data:
+        image = data['image']
+        data['image'] = default_storage.url(image) if image else None
+    return data
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return max(1, min(limit, settings.API_MAX_LIMIT))
+
+
+def get_ids(request):
+    try:
+        ids = [int(pk) for pk in request.GET['ids'].split(',')]
+    except ValueError:
+        raise ApiError('ids должен быть списком чисел через запятую')
+    if len(ids) > settings.API_MAX_LIMIT:
+        raise ApiError(f'Не больше {settings.API_MAX_LIMIT} ids за запрос')
+    return ids
+
+
+def bulk(queryset, ids, selected):
+    """
+    Объекты по списку id одним запросом, в порядке запроса; отсутствующие
+    пропускаются. Как in_bulk(), но по строкам values(): in_bulk() в
+    Django 2.2 работает только с объектами моделей.
+    """
+    found = {
+        row['id']: row
+        for row in rows(queryset.filter(pk__in=ids), selected, ['id'])
+    }
+    return {
+        'results': [serialize(found[pk], selected) for pk in ids
+                    if pk in found]
+    }
+
+
+def listing(request, queryset, fields, key):
+    """
+    Страница списка: не больше limit строк после курсора after= в
+    порядке убывания key и курсор следующей страницы (или None).
+    Для ключа без даты курсор — просто id.
+    """
+    selected = select(request, fields)
+    if 'ids' in request.GET:
+        return bulk(queryset, get_ids(request), selected)
+    limit = get_limit(request)
+    date_field, id_field = key
+    after = request.GET.get('after')
+    if after is not None:
+        queryset = queryset.filter(after_cursor(after, date_field, id_field))
+    ordering = [f'-{id_field}']
+    if date_field:
+        ordering.insert(0, f'-{date_field}')
+    page = list(
+        rows(queryset, selected, filter(None, key)).order_by(*ordering)[
+            :limit + 1
+        ]
+    )
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        next_cursor = (
+            make_cursor(last[date_field], last[id_field]) if date_field
+            else str(last[id_field])
+        )
+    return {
+        'results': [serialize(row, selected) for row in page],
+        'next': next_cursor,
+    }
+
+
+def after_cursor(cursor, date_field, id_field):
+    """Условие «строка старше курсора»."""
+    if not date_field:
+        try:
+            return Q(**{f'{id_field}__lt': int(cursor)})
+        except ValueError:
+            raise ApiError('Некорректный курсор')
+    key = decode_cursor(cursor)
+    if key is None:
+        raise ApiError('Некорректный курсор')
+    date, pk = key
+    return Q(**{f'{date_field}__lte': date}) & (
+        Q(**{f'{date_field}__lt': date}) | Q(**{f'{id_field}__lt': pk})
+    )
+
+
+def detail(request, queryset, fields, **lookup):
+    selected = select(request, fields)
+    return serialize(
+        get_object_or_404(rows(queryset, selected), **lookup), selected
+    )
+
+
+@api_view
+def posts(request):
+    """Записи, можно отобрать по group= (slug) и author= (username)."""
+    queryset = Post.objects.for_feed()
+    if 'group' in request.GET:
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return listing(request, queryset, POST_FIELDS, POST_KEY)
+
+
+@api_view
+def post(request, post_id):
+    return detail(request, Post.objects.for_feed(), POST_FIELDS, id=post_id)
+
+
+@api_view
+def comments(request, post_id):
+    get_object_or_404(Post.objects.only('id'), id=post_id)
+    return listing(
+        request,
+        Comment.objects.filter(post=post_id),
+        COMMENT_FIELDS,
+        COMMENT_KEY
+    )
+
+
+@api_view
+def groups(request):
+    return listing(request, Group.objects.all(), GROUP_FIELDS, ID_KEY)
+
+
+@api_view
+def group(request, slug):
+    return detail(request, Group.objects.all(), GROUP_FIELDS, slug=slug)
+
+
+@api_view
+def profile(request, username):
+    return detail(
+        request, User.objects.all(), PROFILE_FIELDS, username=username
+    )
+
+
+@api_view
+def followers(request, username):
+    """Подписки на автора username."""
+    author = get_object_or_404(User.objects.only('id'), username=username)
+    return listing(
+        request, Follow.objects.filter(author=author), FOLLOW_FIELDS, ID_KEY
+    )
+
+
+@api_view
+def following(request, username):
+    """Подписки пользователя username."""
+    user = get_object_or_404(User.objects.only('id'), username=username)
+    return listing(
+        request, Follow.objects.filter(user=user), FOLLOW_FIELDS, ID_KEY
+    )
@@ -0,0 +1,324 @@
+"""
+Нагрузочный стенд: синтетические данные и замер лент.
+
+synthetic_rows() порождает строки в формате импорта (см. importer):
+число записей автора распределено по Ципфу, на популярных авторов
+чаще подписываются, у части записей есть изображения. seed() пишет их
+через import_rows, то есть bulk_create пачками, и только в пустую базу.
+
+run() гоняет index, group_posts, profile, post_view и follow_index
+тестовым клиентом Django из нескольких потоков, каждый поток — от
+имени своего читателя, и возвращает по каждому представлению p50, p95,
+p99, число SQL-запросов на ответ и пропускную способность. compare()
+сверяет такой отчёт с сохранённым базовым.
+
+Стенд пишет в базу (её выбирает YATUBE_DB), а кэш, метрики и картинки
+держит во временном каталоге isolated(): ключи лент не смешиваются
+с кэшем запущенного сервера, файлы не попадают в настоящий MEDIA_ROOT.
+"""
+import io
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from core.testing import isolated_settings
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .importer import import_rows
+from .models import Group, Post, User
+
+VIEWS = ('index', 'group_posts', 'profile', 'post_view', 'follow_index')
+IMAGE_POOL = 10
+DAYS = 365
+PERCENTILES = (50, 95, 99)
+
+
+class BenchError(ValueError):
+    """Стенд нельзя запустить на текущих данных."""
+
+
+@contextmanager
+def isolated():
+    """
+    Кэши, файл метрик и MEDIA_ROOT на время замера — во временных
+    каталогах, которые удаляются после него. Строгость бюджетов запросов
+    остаётся как в настройках сервера, а не как в тестах.
+    """
+    media = tempfile.mkdtemp(prefix='yatube-bench-')
+    strict = settings.QUERY_BUDGET_STRICT
+    try:
+        with isolated_settings(), override_settings(
+            MEDIA_ROOT=media, QUERY_BUDGET_STRICT=strict
+        ):
+            yield
+    finally:
+        shutil.rmtree(media, ignore_errors=True)
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса рангов 1..count по закону Ципфа."""
+    total = 0
+    weights = []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+def image_names():
+    """Небольшой набор настоящих файлов JPEG для записей с картинкой."""
+    names = []
+    for number in range(IMAGE_POOL):
+        name = f'posts/bench-{number}.jpg'
+        if not default_storage.exists(name):
+            buffer = io.BytesIO()
+            Image.new(
+                'RGB', (1280, 720), (number * 25, 120, 200)
+            ).save(buffer, 'JPEG')
+            name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        names.append(name)
+    return names
+
+
+def synthetic_rows(
+    users, posts, follows, comments, images, groups=10, exponent=1.1,
+    seed=None
+):
+    """Строки импорта со случайными, но воспроизводимыми при seed данными."""
+    rng = random.Random(seed)
+    prefix = f'bench-{uuid.uuid4().hex[:8]}'
+    now = timezone.now()
+    for number in range(1, users + 1):
+        yield {'type': 'user', 'id': number, 'username': f'{prefix}-{number}'}
+    for number in range(1, groups + 1):
+        yield {
+            'type': 'group',
+            'id': number,
+            'title': f'Сообщество {number}',
+            'slug': f'{prefix}-{number}',
+            'description': 'Синтетическое сообщество',
+        }
+    authors = list(range(1, users + 1))
+    weights = zipf_weights(users, exponent)
+    pool = image_names() if images else []
+    with_image = set(rng.sample(range(1, posts + 1), min(images, posts)))
+    for number in range(1, posts + 1):
+        yield {
+            'type': 'post',
+            'id': number,
+            'author': rng.choices(authors, cum_weights=weights)[0],
+            'group': rng.choice((None, rng.randint(1, groups))),
+            'text': f'Синтетическая запись {number} ' * rng.randint(1, 20),
+            'pub_date': (
+                now - timedelta(seconds=rng.uniform(0, DAYS * 86400))
+            ).isoformat(),
+            'image': rng.choice(pool) if number in with_image else None,
+        }
+    for number in range(1, comments + 1):
+        yield {
+            'type': 'comment',
+            'id': number,
+            'post': rng.randint(1, posts),
+            'author': rng.randint(1, users),
+            'text': f'Синтетический комментарий {number}',
+        }
+    for user, author in follow_pairs(rng, users, follows, weights):
+        yield {'type': 'follow', 'user': user, 'author': author}
+
+
+def follow_pairs(rng, users, follows, weights):
+    """
+    Пары (подписчик, автор) без повторов. Подписчики распределены по
+    авторам по Ципфу; автору, у которого их набралось больше users - 1,
+    остаток достаётся следующим по рангу авторам.
+    """
+    capacity = users - 1
+    authors = range(1, users + 1)
+    per_author = Counter(rng.choices(
+        authors, cum_weights=weights, k=min(follows, users * capacity)
+    ))
+    spare = 0
+    for author in authors:
+        spare += max(per_author[author] - capacity, 0)
+        per_author[author] = min(per_author[author], capacity)
+    for author in authors:
+        extra = min(capacity - per_author[author], spare)
+        per_author[author] += extra
+        spare -= extra
+    for author in authors:
+        # Подписчики — случайные пользователи, кроме самого автора.
+        for user in rng.sample(range(1, users), per_author[author]):
+            yield user + (user >= author), author
+
+
+def seed(**volumes):
+    """
+    Загружает синтетические данные; возвращает их число и время.
+    В базе с пользователями или записями поднимает BenchError: стенд
+    не должен смешивать свои данные с настоящими.
+    """
+    if User.objects.exists() or Post.objects.exists():
+        raise BenchError(
+            f'база {connection.settings_dict["NAME"]} не пуста: загружайте '
+            'синтетические данные в отдельную базу (YATUBE_DB) или '
+            'замеряйте с --skip-seed'
+        )
+    started = time.monotonic()
+    counts = import_rows(synthetic_rows(**volumes))
+    return {'counts': counts, 'seconds': time.monotonic() - started}
+
+
+def targets(rng, samples):
+    """Адреса для замера: до samples на каждое представление."""
+    authors = list(
+        User.objects.filter(counters__posts__gt=0).order_by(
+            '-counters__posts'
+        ).values_list('username', flat=True)[:samples]
+    )
+    groups = list(Group.objects.values_list('slug', flat=True)[:samples])
+    bounds = Post.objects.aggregate(low=Min('id'), high=Max('id'))
+    ids = []
+    if bounds['low'] is not None:
+        ids = [
+            rng.randint(bounds['low'], bounds['high'])
+            for _ in range(samples)
+        ]
+    posts = Post.objects.filter(id__in=ids).values_list(
+        'id', 'author__username'
+    )
+    return {
+        'index': [reverse('posts:index')],
+        'group_posts': [
+            reverse('posts:group_posts', args=[slug]) for slug in groups
+        ],
+        'profile': [
+            reverse('posts:profile', args=[username]) for username in authors
+        ],
+        'post_view': [
+            reverse('posts:post', args=[username, post_id])
+            for post_id, username in posts
+        ],
+        'follow_index': [reverse('posts:follow_index')],
+    }
+
+
+def percentile(values, percent):
+    """Значение ранга percent по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def drive(user, urls, requests, results, lock, rng):
+    """Поток замера: requests запросов к случайным адресам."""
+    client = Client(HTTP_HOST='localhost')
+    client.force_login(user)
+    samples = []
+    try:
+        for _ in range(requests):
+            view = rng.choice(VIEWS)
+            url = rng.choice(urls[view])
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url)
+                duration = time.perf_counter() - start
+            samples.append((
+                view, duration, len(queries), response.status_code != 200
+            ))
+    finally:
+        connection.close()
+    with lock:
+        results.extend(samples)
+
+
+def run(threads=4, requests=200, samples=50, seed=None):
+    """
+    Замер лент из threads потоков по requests запросов. Возвращает отчёт,
+    пригодный для json.dumps.
+    """
+    rng = random.Random(seed)
+    urls = targets(rng, samples)
+    if not all(urls.values()):
+        raise BenchError('Нет данных для замера: сначала загрузите их')
+    readers = list(
+        User.objects.filter(follower__isnull=False).distinct()[:threads]
+    ) or list(User.objects.all()[:threads])
+    results = []
+    lock = threading.Lock()
+    jobs = [
+        (readers[number % len(readers)], urls, requests, results, lock,
+         random.Random(rng.random()))
+        for number in range(threads)
+    ]
+    started = time.monotonic()
+    if threads == 1:
+        drive(*jobs[0])
+    else:
+        workers = [threading.Thread(target=drive, args=job) for job in jobs]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    elapsed = time.monotonic() - started
+    report = {
+        view: summary([row for row in results if row[0] == view], elapsed)
+        for view in VIEWS
+    }
+    report['total'] = summary(results, elapsed)
+    return report
+
+
+def summary(rows, elapsed):
+    if not rows:
+        return {'requests': 0}
+    latencies = [row[1] * 1000 for row in rows]
+    report = {
+        'requests': len(rows),
+        'errors': sum(row[3] for row in rows),
+        'queries_per_request': round(
+            sum(row[2] for row in rows) / len(rows), 2
+        ),
+        'throughput_rps': round(len(rows) / elapsed, 1),
+    }
+    for percent in PERCENTILES:
+        report[f'p{percent}_ms'] = round(percentile(latencies, percent), 2)
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """
+    Расхождения с базовым отчётом больше tolerance (доля): рост p95 и
+    числа запросов или падение пропускной способности.
+    """
+    regressions = []
+    for view, current in report.items():
+        previous = baseline.get(view)
+        if not previous or not current.get('requests'):
+            continue
+        for metric, worse in (
+            ('p95_ms', 1), ('queries_per_request', 1), ('throughput_rps', -1)
+        ):
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change * worse > tolerance:
+                regressions.append(
+                    f'{view}.{metric}: {old} -> {new} ({change:+.0%})'
+                )
+    return regressions
@@ -0,0 +1,65 @@
+"""
+Внутрипроцессный брокер событий о новых записях.
+
+Сигнал post_save публикует событие после фиксации транзакции, а потоки
+SSE-соединений ждут новых событий на threading.Condition, не опрашивая
+базу. Брокер хранит последние BUFFER_SIZE событий, чтобы медленный
+подписчик не терял их между ожиданиями, и ограничивает число подписчиков
+на процесс. События видны только в процессе, где запись сохранена;
+пропущенное клиент получает при переподключении по Last-Event-ID.
+"""
+import threading
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+BUFFER_SIZE = 1000
+
+Event = namedtuple('Event', 'seq post_id author_id data')
+
+
+class Busy(Exception):
+    """Достигнут предел подписчиков на процесс."""
+
+
+class Broker:
+    def __init__(self, buffer_size=BUFFER_SIZE):
+        self._events = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._seq = 0
+        self.subscribers = 0
+
+    @property
+    def seq(self):
+        """Номер последнего опубликованного события."""
+        return self._seq
+
+    def publish(self, post_id, author_id, data):
+        with self._condition:
+            self._seq += 1
+            self._events.append(Event(self._seq, post_id, author_id, data))
+            self._condition.notify_all()
+
+    @contextmanager
+    def subscription(self, limit):
+        """Учитывает подписчика; сверх limit поднимает Busy."""
+        with self._condition:
+            if self.subscribers >= limit:
+                raise Busy
+            self.subscribers += 1
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    def wait(self, seq, timeout):
+        """
+        События с номером больше seq; если их нет, ждёт до timeout
+        секунд и возвращает пустой список.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > seq, timeout)
+            return [event for event in self._events if event.seq > seq]
+
+
+broker = Broker()
@@ -0,0 +1,72 @@
+"""
+Денормализованные счётчики пользователей.
+
+Счётчики меняются атомарно F-выражениями в сигналах, а reconcile()
+пересчитывает их пачками и исправляет накопившиеся расхождения
+(например, после bulk_create, который сигналы не отправляет).
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Counters, Follow, Post, User
+
+BATCH_SIZE = 500
+FIELDS = {
+    'followers': (Follow, 'author'),
+    'following': (Follow, 'user'),
+    'posts': (Post, 'author'),
+}
+
+
+def change(user_id, **deltas):
+    """Атомарно прибавляет к счётчикам пользователя значения deltas."""
+    Counters.objects.filter(user=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def actual(field):
+    """Подзапрос с фактическим значением счётчика field."""
+    model, user_field = FIELDS[field]
+    rows = model.objects.filter(
+        **{user_field: OuterRef('user')}
+    ).order_by().values(user_field).annotate(count=Count('pk'))
+    return Coalesce(
+        Subquery(rows.values('count'), output_field=IntegerField()), 0
+    )
+
+
+def reconcile(after=0):
+    """
+    Создаёт недостающие счётчики и пересчитывает разошедшиеся у
+    пользователей с id больше after, проходя их пачками по BATCH_SIZE.
+    Возвращает число созданных и исправленных строк.
+    """
+    created = fixed = 0
+    users = User.objects.order_by('pk').values_list('pk', flat=True)
+    while True:
+        ids = list(users.filter(pk__gt=after)[:BATCH_SIZE])
+        if not ids:
+            return created, fixed
+        after = ids[-1]
+        missing = users.filter(pk__in=ids, counters__isnull=True)
+        with transaction.atomic():
+            created += len(Counters.objects.bulk_create(
+                (Counters(user_id=user_id) for user_id in missing),
+                ignore_conflicts=True
+            ))
+            drifted = list(
+                Counters.objects.filter(user__in=ids).annotate(**{
+                    f'actual_{field}': actual(field) for field in FIELDS
+                }).filter(reduce(or_, (
+                    ~Q(**{field: F(f'actual_{field}')}) for field in FIELDS
+                ))).values_list('user', flat=True)
+            )
+            Counters.objects.filter(user__in=drifted).update(
+                **{field: actual(field) for field in FIELDS}
+            )
+        fixed += len(drifted)
@@ -0,0 +1,122 @@
+"""
+Выгрузка записей, комментариев и изображений пользователя в zip.
+
+Архив пишется в поток по мере чтения данных: строки читаются
+iterator() пачками, файлы изображений — кусками по CHUNK_SIZE, а
+готовые байты архива сразу отдаются клиенту. Поэтому память не растёт
+с числом записей автора.
+"""
+import json
+import time
+import zipfile
+
+from django.core.files.storage import default_storage
+
+from .models import Comment, Post
+
+BATCH_SIZE = 2000
+CHUNK_SIZE = 64 * 1024
+IMAGES_DIR = 'images'
+
+
+class ZipStream:
+    """
+    Приёмник для ZipFile без seek и tell: копит записанные байты, пока
+    их не заберёт генератор ответа.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self, at_least=CHUNK_SIZE):
+        """Накопленные байты, если их не меньше at_least, иначе b''."""
+        if self.size < at_least:
+            return b''
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def image_path(name):
+    return f'{IMAGES_DIR}/{name}'
+
+
+def post_lines(user):
+    posts = Post.objects.filter(author=user).values_list(
+        'id', 'text', 'pub_date', 'group__slug', 'image'
+    ).order_by('pub_date', 'id')
+    for post_id, text, pub_date, group, image in posts.iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        yield {
+            'id': post_id,
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'group': group,
+            'image': image_path(image) if image else None,
+        }
+
+
+def comment_lines(user):
+    comments = Comment.objects.filter(author=user).values_list(
+        'id', 'post', 'text', 'created'
+    ).order_by('created', 'id')
+    for comment_id, post_id, text, created in comments.iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        yield {
+            'id': comment_id,
+            'post': post_id,
+            'text': text,
+            'created': created.isoformat(),
+        }
+
+
+def image_names(user):
+    return Post.objects.filter(author=user).exclude(image='').exclude(
+        image__isnull=True
+    ).values_list('image', flat=True).order_by('id').iterator(
+        chunk_size=BATCH_SIZE
+    )
+
+
+def export_zip(user):
+    """Генератор байтов zip-архива с данными пользователя."""
+    return (chunk for chunk in write_archive(user, ZipStream()) if chunk)
+
+
+def write_archive(user, stream):
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, lines in (
+            ('posts.jsonl', post_lines(user)),
+            ('comments.jsonl', comment_lines(user)),
+        ):
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                for line in lines:
+                    entry.write(
+                        json.dumps(line, ensure_ascii=False).encode() + b'\n'
+                    )
+                    yield stream.take()
+        for name in image_names(user):
+            try:
+                source = default_storage.open(name)
+            except FileNotFoundError:
+                continue
+            # Изображения уже сжаты, повторно их не сжимаем.
+            info = zipfile.ZipInfo(image_path(name), time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            with source, archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in source.chunks(CHUNK_SIZE):
+                    entry.write(chunk)
+                    yield stream.take()
+    yield stream.take(at_least=0)
@@ -0,0 +1,83 @@
+"""
+Версии закэшированных лент.
+
+Ключи фрагментов {% cache %} лент содержат номер версии своей области:
+главной страницы, сообщества или автора. Сигналы увеличивают версию
+только тех областей, которые затронула запись, поэтому фрагменты можно
+хранить долго, а изменения видны сразу. Рядом с версией хранится время
+последнего изменения области — из него лента берёт Last-Modified.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'feed_version'
+CHANGED_PREFIX = 'feed_changed'
+
+
+def scope_key(scope):
+    return f'{KEY_PREFIX}:{scope}'
+
+
+def changed_key(scope):
+    return f'{CHANGED_PREFIX}:{scope}'
+
+
+def initial_version():
+    # Версия, потерянная при вытеснении из кэша, не должна повториться,
+    # иначе снова станут видны старые фрагменты.
+    return time.time_ns()
+
+
+def versions(*scopes):
+    """Текущие версии областей через дефис."""
+    keys = [scope_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: initial_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return '-'.join(str(found[key]) for key in keys)
+
+
+def bump(*scopes):
+    """Увеличивает версии областей, сбрасывая их закэшированные ленты."""
+    for scope in scopes:
+        try:
+            cache.incr(scope_key(scope))
+        except ValueError:
+            cache.set(scope_key(scope), initial_version(), None)
+    now = time.time()
+    cache.set_many({changed_key(scope): now for scope in scopes}, None)
+
+
+def changed(*scopes):
+    """
+    Время последнего изменения областей. Если оно вытеснено из кэша,
+    изменением считается текущий момент.
+    """
+    keys = [changed_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return max(found.values())
+
+
+def feed_cache(*scopes):
+    """Контекст для {% cache %} ленты: время жизни и версия."""
+    return {
+        'timeout': settings.FEED_CACHE_TIMEOUT,
+        'version': versions(*scopes),
+    }
+
+
+def post_scopes(post, group_id=None):
+    """Области, в которых показывается запись."""
+    scopes = {'index', f'author:{post.author_id}'}
+    for group in (post.group_id, group_id):
+        if group is not None:
+            scopes.add(f'group:{group}')
+    return scopes
@@ -0,0 +1,193 @@
+"""
+RSS- и Atom-ленты главной страницы, сообществ и авторов.
+
+Ленты строятся на тех же QuerySet, что и index, group_posts и profile.
+ETag вычисляется по дате последней записи и версии области feed_cache,
+Last-Modified — по времени её последнего изменения, без сборки ленты,
+поэтому опрашивающие клиенты обычно получают 304. Собранная лента
+кэшируется по тому же ключу.
+"""
+import hashlib
+import math
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import linebreaksbr, truncatewords
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+
+from core.single_flight import get_or_build
+
+from . import feed_cache
+from .models import Group, Post, User
+
+KEY_PREFIX = 'syndication'
+
+
+class PostsFeed(Feed):
+    """Общая часть лент: последние NUMBER_OF_POSTS записей."""
+
+    def items(self, obj):
+        return self.posts(obj)[:settings.NUMBER_OF_POSTS]
+
+    def item_title(self, item):
+        return truncatewords(item.text, 10)
+
+    def item_description(self, item):
+        return linebreaksbr(item.text)
+
+    def item_link(self, item):
+        return reverse('posts:post', args=[item.author.username, item.id])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class IndexFeed(PostsFeed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return Post.objects.for_feed()
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_posts', args=[group.slug])
+
+    def posts(self, group):
+        return group.posts.for_feed()
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи автора {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def posts(self, author):
+        return author.posts.for_feed()
+
+
+class IndexAtomFeed(IndexFeed):
+    feed_type = Atom1Feed
+    subtitle = IndexFeed.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return self.description(group)
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
+
+
+def index_source():
+    return 'index', Post.objects.all()
+
+
+def group_source(slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True
+    ).first()
+    if group_id is not None:
+        return f'group:{group_id}', Post.objects.filter(group=group_id)
+
+
+def author_source(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True
+    ).first()
+    if author_id is not None:
+        return f'author:{author_id}', Post.objects.filter(author=author_id)
+
+
+def cached_feed(feed, get_source):
+    """
+    Представление ленты feed с условными запросами и кэшем.
+
+    get_source получает именованные аргументы представления и
+    возвращает область feed_cache и записи ленты или None, если
+    объекта нет.
+    """
+    def view(request, **kwargs):
+        source = get_source(**kwargs)
+        if source is None:
+            raise Http404
+        scope, posts = source
+        latest = posts.order_by('-pub_date').values_list(
+            'pub_date', flat=True
+        ).first()
+        # Удаление и правка записей, переименование сообщества не меняют
+        # дату новейшей записи, но меняют время изменения области.
+        last_modified = math.ceil(max(
+            latest.timestamp() if latest else 0, feed_cache.changed(scope)
+        ))
+        key = hashlib.md5(
+            f'{request.path}:{latest}:{feed_cache.versions(scope)}'.encode()
+        ).hexdigest()
+        etag = f'"{key}"'
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            entry = get_or_build(
+                f'{KEY_PREFIX}:{key}',
+                lambda: render(feed, request, kwargs),
+                settings.FEED_CACHE_TIMEOUT
+            )
+            response = HttpResponse(
+                entry['body'], content_type=entry['content_type']
+            )
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+    return view
+
+
+def render(feed, request, kwargs):
+    response = feed(request, **kwargs)
+    return {
+        'body': response.content,
+        'content_type': response['Content-Type'],
+    }
+
+
+index_rss = cached_feed(IndexFeed(), index_source)
+index_atom = cached_feed(IndexAtomFeed(), index_source)
+group_rss = cached_feed(GroupFeed(), group_source)
+group_atom = cached_feed(GroupAtomFeed(), group_source)
+author_rss = cached_feed(AuthorFeed(), author_source)
+author_atom = cached_feed(AuthorAtomFeed(), author_source)
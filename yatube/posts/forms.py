@@ -1,5 +1,7 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
+from . import images
 from .models import Comment, Post
 
 
@@ -13,6 +15,12 @@ class PostForm(ModelForm):
             'image': 'Можете добавить картинку.',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return images.normalize(image)
+        return image
+
 
 class CommentForm(ModelForm):
     class Meta:
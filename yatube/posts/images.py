@@ -0,0 +1,156 @@
+"""
+Подготовка изображений записей.
+
+При загрузке изображение поворачивается по EXIF, уменьшается до
+MAX_DIMENSION по большей стороне и пересохраняется без метаданных;
+изображение без EXIF и не больше MAX_DIMENSION сохраняется как есть, а
+у анимированного пересохраняются все кадры.
+Воркер миниатюр затем нарезает из него варианты ширины WIDTHS в
+современных форматах с пропорциями карточки ленты, а шаблон отдаёт их
+браузеру через srcset, чтобы телефон не качал картинку для десктопа.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps, ImageSequence
+
+MAX_DIMENSION = 2048
+WIDTHS = (320, 640, 960, 1280)
+# Пропорции карточки ленты, как у миниатюры 960x339.
+ASPECT = 339 / 960
+VARIANTS_DIR = 'posts/variants'
+# Формат: (расширение, MIME-тип, параметры сохранения), от лучшего
+# сжатия к худшему — браузер берёт первый поддерживаемый <source>.
+FORMATS = {
+    'AVIF': ('avif', 'image/avif', {'quality': 60}),
+    'WEBP': ('webp', 'image/webp', {'quality': 80, 'method': 6}),
+}
+JPEG_QUALITY = 85
+# Тег EXIF с ориентацией снимка.
+ORIENTATION = 0x0112
+
+
+def supported_formats():
+    """Форматы вариантов, которые умеет сохранять установленный Pillow."""
+    Image.init()
+    return [name for name in FORMATS if name in Image.SAVE]
+
+
+def normalize(upload):
+    """
+    Загруженное изображение без EXIF и не больше MAX_DIMENSION.
+    Формат и имя файла сохраняются; файл, которому нечего исправлять,
+    возвращается без пересохранения.
+    """
+    image = Image.open(upload)
+    image_format = image.format
+    if not image.getexif() and max(image.size) <= MAX_DIMENSION:
+        upload.seek(0)
+        return upload
+    if getattr(image, 'is_animated', False):
+        content = save_frames(image, image_format)
+    else:
+        content = BytesIO()
+        image = fit(ImageOps.exif_transpose(image))
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options = {'quality': JPEG_QUALITY} if image_format == 'JPEG' else {}
+        image.save(content, image_format, **options)
+    return SimpleUploadedFile(
+        upload.name,
+        content.getvalue(),
+        Image.MIME.get(image_format, upload.content_type)
+    )
+
+
+def fit(image):
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS)
+    return image
+
+
+def save_frames(image, image_format):
+    """
+    Пересохраняет все кадры анимации с их длительностями: иначе от
+    анимированного GIF или WebP остался бы только первый кадр.
+    """
+    method = {
+        2: Image.FLIP_LEFT_RIGHT,
+        3: Image.ROTATE_180,
+        4: Image.FLIP_TOP_BOTTOM,
+        5: Image.TRANSPOSE,
+        6: Image.ROTATE_270,
+        7: Image.TRANSVERSE,
+        8: Image.ROTATE_90,
+    }.get(image.getexif().get(ORIENTATION))
+    frames = []
+    durations = []
+    for frame in ImageSequence.Iterator(image):
+        durations.append(frame.info.get('duration', 0))
+        frame = frame.convert('RGBA')
+        if method is not None:
+            frame = frame.transpose(method)
+        frames.append(fit(frame))
+    content = BytesIO()
+    frames[0].save(
+        content,
+        image_format,
+        save_all=True,
+        append_images=frames[1:],
+        duration=durations,
+        loop=image.info.get('loop', 0)
+    )
+    return content
+
+
+def variant_name(image_name, width, image_format):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    extension = FORMATS[image_format][0]
+    return f'{VARIANTS_DIR}/{stem}-{width}w.{extension}'
+
+
+def make_variants(image_name):
+    """
+    Сохраняет варианты изображения всех ширин во всех поддерживаемых
+    форматах. Возвращает форматы через запятую для Post.image_formats.
+    """
+    formats = supported_formats()
+    with default_storage.open(image_name) as source:
+        image = Image.open(source)
+        image.load()
+    image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    for width in WIDTHS:
+        variant = ImageOps.fit(
+            image, (width, round(width * ASPECT)), Image.LANCZOS
+        )
+        for image_format in formats:
+            content = BytesIO()
+            variant.save(content, image_format, **FORMATS[image_format][2])
+            name = variant_name(image_name, width, image_format)
+            default_storage.delete(name)
+            default_storage.save(name, ContentFile(content.getvalue()))
+    return ','.join(formats)
+
+
+def srcset(image_name, image_format):
+    return ', '.join(
+        '{} {}w'.format(
+            default_storage.url(variant_name(image_name, width, image_format)),
+            width
+        )
+        for width in WIDTHS
+    )
+
+
+def sources(image_name, formats):
+    """Элементы <source> для <picture>: MIME-тип и srcset."""
+    return [
+        {
+            'type': FORMATS[image_format][1],
+            'srcset': srcset(image_name, image_format),
+        }
+        for image_format in formats
+        if image_format in FORMATS
+    ]
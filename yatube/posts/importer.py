@@ -0,0 +1,226 @@
+"""
+Массовая загрузка пользователей, сообществ, записей, комментариев и
+подписок из JSONL.
+
+Каждая строка — объект с полем type (user, group, post, comment,
+follow) и полями модели; ссылки на другие объекты задаются их id в
+источнике, и объект должен встретиться раньше ссылки на него. Строки
+копятся в буферах и пишутся bulk_create по BATCH_SIZE штук, каждая
+пачка — в своей транзакции, поэтому память не растёт с размером файла.
+
+id источника переводятся в id базы сдвигом на максимальный id таблицы
+до загрузки: такое отображение не хранит по записи на объект.
+Сигналы при bulk_create не отправляются, поэтому счётчики, ленты
+подписок, поисковый индекс и очередь миниатюр обновляются после
+загрузки — только для загруженных id, то есть больших сдвига, и даже
+если загрузка прервалась ошибкой: записанные пачки остаются в базе.
+"""
+import json
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed_cache, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 5000
+# Порядок записи буферов: сначала объекты, на которые ссылаются другие.
+ORDER = ('user', 'group', 'post', 'comment', 'follow')
+# Модели с auto_now_add: их даты из файла пишутся в обход pre_save.
+ORIGINAL_DATES = ('post', 'comment')
+
+
+class ImportDataError(ValueError):
+    """Некорректная строка во входных данных."""
+
+
+class IdMap:
+    """Перевод id источника в id базы."""
+
+    def __init__(self, model):
+        self.offset = model.objects.aggregate(top=Max('pk'))['top'] or 0
+
+    def __getitem__(self, source_id):
+        if source_id is None:
+            return None
+        if not isinstance(source_id, int) or source_id < 1:
+            raise ImportDataError(
+                f'id должен быть целым больше нуля: {source_id}'
+            )
+        return self.offset + source_id
+
+
+def parse_date(value):
+    """Дата из ISO 8601; без часового пояса считается UTC."""
+    if value is None:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ImportDataError(f'некорректная дата: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+def insert_raw(model, rows):
+    """
+    bulk_create без pre_save полей, как при loaddata: auto_now_add не
+    заменяет заданную в объекте дату текущим временем.
+    """
+    fields = model._meta.concrete_fields
+    size = connection.ops.bulk_batch_size(fields, rows)
+    for start in range(0, len(rows), size):
+        model._base_manager._insert(
+            rows[start:start + size], fields=fields, raw=True
+        )
+
+
+class Importer:
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.maps = {
+            'user': IdMap(User),
+            'group': IdMap(Group),
+            'post': IdMap(Post),
+            'comment': IdMap(Comment),
+        }
+        self.last_follow = Follow.objects.aggregate(
+            top=Max('pk')
+        )['top'] or 0
+        self.buffers = {kind: [] for kind in ORDER}
+        self.buffered = 0
+        self.counts = dict.fromkeys(ORDER, 0)
+        self.builders = {
+            'user': self.build_user,
+            'group': self.build_group,
+            'post': self.build_post,
+            'comment': self.build_comment,
+            'follow': self.build_follow,
+        }
+
+    def build_user(self, row):
+        return User(
+            id=self.maps['user'][row['id']],
+            username=row['username'],
+            first_name=row.get('first_name', ''),
+            last_name=row.get('last_name', ''),
+            email=row.get('email', ''),
+            password=row.get('password') or make_password(None),
+            date_joined=parse_date(row.get('date_joined'))
+        )
+
+    def build_group(self, row):
+        return Group(
+            id=self.maps['group'][row['id']],
+            title=row['title'],
+            slug=row['slug'],
+            description=row.get('description', '')
+        )
+
+    def build_post(self, row):
+        return Post(
+            id=self.maps['post'][row['id']],
+            text=row['text'],
+            author_id=self.maps['user'][row['author']],
+            group_id=self.maps['group'][row.get('group')],
+            pub_date=parse_date(row.get('pub_date')),
+            image=row.get('image') or None
+        )
+
+    def build_comment(self, row):
+        return Comment(
+            id=self.maps['comment'][row['id']],
+            post_id=self.maps['post'][row['post']],
+            author_id=self.maps['user'][row['author']],
+            text=row['text'],
+            created=parse_date(row.get('created'))
+        )
+
+    def build_follow(self, row):
+        return Follow(
+            user_id=self.maps['user'][row['user']],
+            author_id=self.maps['user'][row['author']]
+        )
+
+    def add(self, row):
+        try:
+            kind = row['type']
+            self.buffers[kind].append(self.builders[kind](row))
+        except KeyError as error:
+            raise ImportDataError(f'нет поля или неизвестный тип: {error}')
+        self.buffered += 1
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with transaction.atomic():
+            for kind in ORDER:
+                rows = self.buffers[kind]
+                if not rows:
+                    continue
+                if kind in ORIGINAL_DATES:
+                    insert_raw(type(rows[0]), rows)
+                else:
+                    type(rows[0]).objects.bulk_create(
+                        rows, ignore_conflicts=kind == 'follow'
+                    )
+                self.counts[kind] += len(rows)
+                self.buffers[kind] = []
+        self.buffered = 0
+
+    def finish(self):
+        """
+        Обновляет для загруженных объектов данные, которые обычно
+        поддерживают сигналы.
+        """
+        counters.reconcile(self.maps['user'].offset)
+        timeline.backfill_follows(self.last_follow)
+        search.index_after(
+            self.maps['post'].offset, self.maps['comment'].offset
+        )
+        thumbnails.backfill(self.maps['post'].offset)
+        feed_cache.bump('index')
+
+
+def import_lines(lines, batch_size=BATCH_SIZE, progress=None):
+    """
+    Загружает строки JSONL. После каждой пачки вызывает
+    progress(число строк, секунд с начала). Возвращает число
+    загруженных объектов каждого типа.
+    """
+    importer = Importer(batch_size)
+    started = time.monotonic()
+    total = 0
+    try:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                importer.add(json.loads(line))
+            except (ImportDataError, ValueError) as error:
+                raise ImportDataError(f'строка {number}: {error}')
+            total += 1
+            if progress and importer.buffered == 0:
+                progress(total, time.monotonic() - started)
+        importer.flush()
+        if progress:
+            progress(total, time.monotonic() - started)
+    finally:
+        importer.finish()
+    return importer.counts
+
+
+def import_rows(rows, batch_size=BATCH_SIZE):
+    """Загружает уже разобранные строки, например сгенерированные."""
+    importer = Importer(batch_size)
+    try:
+        for row in rows:
+            importer.add(row)
+        importer.flush()
+    finally:
+        importer.finish()
+    return importer.counts
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.thumbnails import backfill
+
+
+class Command(BaseCommand):
+    help = 'Ставит в очередь миниатюры уже загруженных изображений.'
+
+    def handle(self, *args, **options):
+        count = backfill()
+        self.stdout.write(self.style.SUCCESS(
+            f'Поставлено в очередь: {count}'
+        ))
@@ -0,0 +1,93 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bench
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает синтетические данные и замеряет ленты из нескольких '
+        'потоков: p50/p95/p99, SQL-запросы на ответ и пропускную '
+        'способность в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--images', type=int, default=500)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель Ципфа для числа записей на автора.'
+        )
+        parser.add_argument(
+            '--skip-seed',
+            action='store_true',
+            help=(
+                'Замерять на уже загруженных данных; без него данные '
+                'загружаются только в пустую базу (см. YATUBE_DB).'
+            )
+        )
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Запросов на поток.'
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help='Куда сохранить отчёт JSON.')
+        parser.add_argument(
+            '--baseline',
+            help='Отчёт JSON, с которым сравнить результат.'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Допустимое ухудшение относительно базового отчёта.'
+        )
+
+    def handle(self, *args, **options):
+        report = {}
+        try:
+            with bench.isolated():
+                if not options['skip_seed']:
+                    report['seed'] = bench.seed(
+                        users=options['users'],
+                        posts=options['posts'],
+                        follows=options['follows'],
+                        comments=options['comments'],
+                        images=options['images'],
+                        groups=options['groups'],
+                        exponent=options['zipf'],
+                        seed=options['seed']
+                    )
+                report['views'] = bench.run(
+                    options['threads'],
+                    options['requests'],
+                    seed=options['seed']
+                )
+        except bench.BenchError as error:
+            raise CommandError(error)
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        self.stdout.write(text)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(text)
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as baseline:
+                previous = json.load(baseline)
+            regressions = bench.compare(
+                report['views'], previous['views'], options['tolerance']
+            )
+            if regressions:
+                raise CommandError(
+                    'Хуже базового отчёта: ' + '; '.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Не хуже базового отчёта'))
@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import BATCH_SIZE, ImportDataError, import_lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает пользователей, сообщества, записи, комментарии и '
+        'подписки из файлов JSONL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            help='Файлы JSONL; «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк писать одной транзакцией.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            counts = import_lines(
+                self.lines(options['paths']),
+                options['batch_size'],
+                self.progress
+            )
+        except ImportDataError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{kind}: {count}' for kind, count in counts.items()
+        )))
+
+    def lines(self, paths):
+        for path in paths:
+            if path == '-':
+                yield from sys.stdin
+                continue
+            with open(path, encoding='utf-8') as lines:
+                yield from lines
+
+    def progress(self, total, seconds):
+        rate = total / seconds if seconds else 0
+        self.stdout.write(f'Загружено строк: {total} ({rate:.0f} в секунду)')
@@ -0,0 +1,60 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.thumbnails import BATCH_SIZE, process_batch
+
+
+class Command(BaseCommand):
+    help = 'Делает миниатюры изображений из очереди в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов; 0 — работать в текущем процессе.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько задач забирать из очереди за раз.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['workers']:
+            self.work(None, options)
+            return
+        # Дочерние процессы не должны унаследовать открытые соединения.
+        connections.close_all()
+        with ProcessPoolExecutor(options['workers']) as executor:
+            self.work(executor, options)
+
+    def work(self, executor, options):
+        total = 0
+        while True:
+            count = process_batch(executor, options['batch_size'])
+            total += count
+            if count:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано задач: {total}'
+        ))
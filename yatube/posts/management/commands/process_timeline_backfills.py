@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.timeline import BATCH_SIZE, process_backfills
+
+
+class Command(BaseCommand):
+    help = (
+        'Раскладывает по лентам подписчиков записи авторов, '
+        'переставших быть популярными.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько задач забирать из очереди за раз.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            count = process_backfills(options['batch_size'])
+            total += count
+            if count:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано задач: {total}'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс записей и комментариев.'
+
+    def handle(self, *args, **options):
+        posts, comments = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано записей: {posts}, комментариев: {comments}'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики подписчиков, подписок и записей.'
+
+    def handle(self, *args, **options):
+        created, fixed = reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано счётчиков: {created}, исправлено: {fixed}'
+        ))
@@ -0,0 +1,59 @@
+# Generated by Django 2.2.6 on 2026-10-18 16:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Counters = apps.get_model('posts', 'Counters')
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+
+    def counts(model, field):
+        return dict(
+            model.objects.order_by().values_list(field).annotate(Count('pk'))
+        )
+
+    followers = counts(Follow, 'author')
+    following = counts(Follow, 'user')
+    posts = counts(Post, 'author')
+    Counters.objects.bulk_create(
+        (
+            Counters(
+                user_id=user_id,
+                followers=followers.get(user_id, 0),
+                following=following.get(user_id, 0),
+                posts=posts.get(user_id, 0)
+            )
+            for user_id in User.objects.values_list('id', flat=True)
+        ),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0009_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('followers', models.IntegerField(default=0, verbose_name='Подписчиков')),
+                ('following', models.IntegerField(default=0, verbose_name='Подписок')),
+                ('posts', models.IntegerField(default=0, verbose_name='Записей')),
+            ],
+            options={
+                'verbose_name': 'Счётчики',
+                'verbose_name_plural': 'Счётчики',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Comment = apps.get_model('posts', 'Comment')
+    Post = apps.get_model('posts', 'Post')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts '
+            "USING fts5(text, tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS posts_comment_fts '
+            'USING fts5(text, post_id UNINDEXED, '
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.executemany(
+            'INSERT INTO posts_post_fts (rowid, text) VALUES (%s, %s)',
+            Post.objects.values_list('id', 'text').iterator()
+        )
+        cursor.executemany(
+            'INSERT INTO posts_comment_fts (rowid, text, post_id) '
+            'VALUES (%s, %s, %s)',
+            Comment.objects.values_list('id', 'text', 'post_id').iterator()
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS posts_post_fts')
+        cursor.execute('DROP TABLE IF EXISTS posts_comment_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
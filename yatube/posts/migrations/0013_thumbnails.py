@@ -0,0 +1,34 @@
+# Generated by Django 2.2.6 on 2026-10-18 16:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThumbnailTask',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='thumbnail_task', serialize=False, to='posts.Post', verbose_name='Запись')),
+                ('queued', models.DateTimeField(auto_now=True, verbose_name='Поставлена в очередь')),
+            ],
+            options={
+                'verbose_name': 'Задача миниатюры',
+                'verbose_name_plural': 'Задачи миниатюр',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Миниатюра готова'),
+        ),
+        migrations.AddIndex(
+            model_name='thumbnailtask',
+            index=models.Index(fields=['queued'], name='thumbnail_task_queued_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_formats',
+            field=models.CharField(blank=True, editable=False, max_length=50, verbose_name='Форматы вариантов изображения'),
+        ),
+    ]
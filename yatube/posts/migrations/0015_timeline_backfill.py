@@ -0,0 +1,31 @@
+# Generated by Django 2.2.6 on 2026-10-18 17:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0014_image_formats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineBackfill',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='timeline_backfill', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('queued', models.DateTimeField(auto_now=True, verbose_name='Поставлен в очередь')),
+            ],
+            options={
+                'verbose_name': 'Заполнение лент',
+                'verbose_name_plural': 'Заполнение лент',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelinebackfill',
+            index=models.Index(fields=['queued'], name='timeline_backfill_queued_idx'),
+        ),
+    ]
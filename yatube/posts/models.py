@@ -1,6 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
 from django.db.models.constraints import UniqueConstraint
+from django.db.models.functions import Coalesce
+
+from . import images
 
 User = get_user_model()
 
@@ -20,6 +24,27 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    """Набор запросов к записям."""
+
+    def for_feed(self):
+        """
+        Записи для ленты: автор и группа подтягиваются одним JOIN,
+        число комментариев считается подзапросом только для
+        выбранных строк.
+        """
+        comments = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(
+            count=Count('pk')
+        ).values('count')
+        return self.select_related('author', 'group').annotate(
+            comments_count=Coalesce(
+                Subquery(comments, output_field=models.IntegerField()), 0
+            )
+        )
+
+
 class Post(models.Model):
     """Модель записи."""
     text = models.TextField('Текст')
@@ -48,14 +73,63 @@ class Post(models.Model):
         blank=True,
         null=True
     )
+    thumbnail_ready = models.BooleanField(
+        'Миниатюра готова',
+        default=False,
+        editable=False
+    )
+    image_formats = models.CharField(
+        'Форматы вариантов изображения',
+        max_length=50,
+        blank=True,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         """Дополнительная информация по управлению моделью Post."""
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.text[:15]}...'
 
+    def image_sources(self):
+        """Варианты изображения разной ширины для <picture>."""
+        if not self.image or not self.image_formats:
+            return []
+        return images.sources(self.image.name, self.image_formats.split(','))
+
+
+class ThumbnailTask(models.Model):
+    """Очередь записей, для изображений которых нужно сделать миниатюры."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='thumbnail_task',
+        verbose_name='Запись'
+    )
+    queued = models.DateTimeField('Поставлена в очередь', auto_now=True)
+
+    class Meta:
+        """Дополнительная информация по управлению моделью ThumbnailTask."""
+        verbose_name = 'Задача миниатюры'
+        verbose_name_plural = 'Задачи миниатюр'
+        indexes = [
+            models.Index(fields=['queued'], name='thumbnail_task_queued_idx'),
+        ]
+
 
 class Comment(models.Model):
     """Модель комментирования записей."""
@@ -77,6 +151,12 @@ class Comment(models.Model):
     class Meta:
         """Дополнительная информация по управлению моделью Comment."""
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.text[:15]}...'
@@ -100,6 +180,105 @@ class Follow(models.Model):
         constraints = [
             UniqueConstraint(fields=['user', 'author'], name='follow_unique'),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.user} подписан на {self.author}'
+
+
+class Counters(models.Model):
+    """
+    Счётчики пользователя: подписчики, подписки и записи.
+
+    Обновляются сигналами через F-выражения при создании и удалении
+    Follow и Post; расхождения исправляет команда reconcile_counters.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь'
+    )
+    followers = models.IntegerField('Подписчиков', default=0)
+    following = models.IntegerField('Подписок', default=0)
+    posts = models.IntegerField('Записей', default=0)
+
+    class Meta:
+        """Дополнительная информация по управлению моделью Counters."""
+        verbose_name = 'Счётчики'
+        verbose_name_plural = 'Счётчики'
+
+    def __str__(self) -> str:
+        return f'Счётчики {self.user}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Запись в ленте подписок пользователя.
+
+    Заполняется при публикации (fan-out on write), чтобы лента /follow/
+    читалась одним диапазоном по индексу (user, pub_date, post).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        """Дополнительная информация по управлению моделью TimelineEntry."""
+        constraints = [
+            UniqueConstraint(fields=['user', 'post'], name='timeline_unique'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.post} в ленте {self.user}'
+
+
+class TimelineBackfill(models.Model):
+    """
+    Очередь авторов, чьи записи нужно разложить по лентам подписчиков:
+    автор перестал быть популярным, и его записи, которые читались
+    напрямую, теперь должны попасть в материализованные ленты.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='timeline_backfill',
+        verbose_name='Автор'
+    )
+    queued = models.DateTimeField('Поставлен в очередь', auto_now=True)
+
+    class Meta:
+        """Дополнительная информация по управлению моделью TimelineBackfill."""
+        verbose_name = 'Заполнение лент'
+        verbose_name_plural = 'Заполнение лент'
+        indexes = [
+            models.Index(
+                fields=['queued'], name='timeline_backfill_queued_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Заполнение лент записями {self.author}'
@@ -0,0 +1,110 @@
+"""
+Кэш целых страниц для анонимных пользователей.
+
+Ключ страницы содержит путь с параметрами и версии областей из
+feed_cache, поэтому запись сбрасывает и закэшированные страницы.
+Тело хранится сразу в исходном и сжатом gzip виде, а ETag и
+Last-Modified позволяют отвечать на условные запросы 304 Not Modified.
+Устаревшую страницу собирает один запрос, остальные получают прежнюю
+(см. core.single_flight). Авторизованные пользователи кэш обходят: на
+их страницах есть личные элементы вроде ссылки «Редактировать».
+"""
+import gzip
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from core.single_flight import get_or_build
+
+from . import feed_cache
+
+KEY_PREFIX = 'anonymous_page'
+
+
+def page_key(request, version):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{KEY_PREFIX}:{version}:{path}'
+
+
+def make_entry(response):
+    body = response.content
+    return {
+        'body': body,
+        'gzip': gzip.compress(body),
+        'content_type': response['Content-Type'],
+        'etag': f'"{hashlib.md5(body).hexdigest()}"',
+        'last_modified': int(time.time()),
+    }
+
+
+def entry_response(request, entry):
+    if re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        response = HttpResponse(
+            entry['gzip'], content_type=entry['content_type']
+        )
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(
+            entry['body'], content_type=entry['content_type']
+        )
+    response['Content-Length'] = len(response.content)
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ('Accept-Encoding', 'Cookie'))
+    return get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+        response=response
+    )
+
+
+def anonymous_page_cache(get_scopes):
+    """
+    Кэширует страницу для анонимных GET-запросов.
+
+    get_scopes получает именованные аргументы представления и возвращает
+    области feed_cache, от которых зависит страница, или None, если
+    кэшировать нечего (тогда представление вызывается как обычно).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+            ):
+                return view(request, *args, **kwargs)
+            scopes = get_scopes(**kwargs)
+            if scopes is None:
+                return view(request, *args, **kwargs)
+            response = None
+
+            def build():
+                nonlocal response
+                response = view(request, *args, **kwargs)
+                if (
+                    response.status_code != 200
+                    or response.streaming
+                    or response.cookies
+                ):
+                    return None
+                return make_entry(response)
+
+            entry = get_or_build(
+                page_key(request, feed_cache.versions(*scopes)),
+                build,
+                settings.FEED_CACHE_TIMEOUT
+            )
+            if entry is None:
+                return response
+            return entry_response(request, entry)
+        return wrapper
+    return decorator
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.paginator import Page, Paginator
+from django.db.models import F, Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+KEY = ('pub_date', 'id')
+
+
+def make_cursor(date, pk):
+    """Курсор по ключу: микросекунды даты и id через подчёркивание."""
+    return f'{(date - EPOCH) // MICROSECOND}_{pk}'
+
+
+def encode_cursor(row, date_field='pub_date'):
+    """Курсор строки модели."""
+    return make_cursor(getattr(row, date_field), row.id)
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор, для некорректного значения возвращает None."""
+    try:
+        microseconds, pk = cursor.split('_')
+        return EPOCH + int(microseconds) * MICROSECOND, int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+class KeysetPaginator(Paginator):
+    """
+    Постраничный вывод по ключу (pub_date, id).
+
+    Не считает COUNT(*) и не использует OFFSET: каждая страница читается
+    диапазоном по индексу pub_date начиная с курсора соседней страницы.
+    Возвращает обычный Page, для которого has_next() означает наличие
+    более старых записей, а has_previous() — более новых.
+
+    Вместо одного QuerySet можно передать список пар (QuerySet, ключ):
+    ключ — имена полей, по которым в этом наборе упорядочены pub_date и
+    id записи. Страницы таких наборов сливаются в одну ленту.
+
+    Для других моделей ключ задаётся аргументом key, например
+    ('created', 'id') для комментариев.
+    """
+    keyset = True
+
+    def __init__(self, object_list, per_page, key=KEY, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if isinstance(object_list, (list, tuple)):
+            self.sources = object_list
+        else:
+            self.sources = [(object_list, key)]
+        self.date_field = key[0]
+        self.cursor = ''
+        self._number = 1
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    @property
+    def num_pages(self):
+        return self._number + (self.next_cursor is not None)
+
+    @property
+    def count(self):
+        return self.num_pages * self.per_page
+
+    def get_page(self, after=None, before=None):
+        """
+        Страница записей старше курсора after или новее курсора before.
+        Без курсора (или с некорректным курсором) возвращает первую
+        страницу.
+        """
+        before_key = decode_cursor(before)
+        if before_key is not None:
+            rows = self._rows(*before_key, newer=True)
+            if len(rows) > self.per_page:
+                self.cursor = f'before:{before}'
+                return self._build_page(
+                    rows[:self.per_page][::-1], has_newer=True, has_older=True
+                )
+        after_key = decode_cursor(after)
+        if after_key is not None:
+            self.cursor = f'after:{after}'
+            rows = self._rows(*after_key)
+            return self._build_page(
+                rows[:self.per_page],
+                has_newer=True,
+                has_older=len(rows) > self.per_page
+            )
+        rows = self._rows()
+        return self._build_page(
+            rows[:self.per_page],
+            has_newer=False,
+            has_older=len(rows) > self.per_page
+        )
+
+    def lazy_page(self, after=None, before=None):
+        """
+        Как get_page(), но записи читаются при первом обращении к
+        странице: если её фрагмент уже в кэше, запросов не будет.
+        """
+        return LazyPage(self, after, before)
+
+    def _rows(self, pub_date=None, pk=None, newer=False):
+        """
+        До per_page + 1 записей за курсором: старше него или, при
+        newer=True, новее него в порядке приближения к курсору.
+
+        Условие на ключ накладывается одним filter(), чтобы ключ из
+        связанной таблицы читался через тот же JOIN, что и сортировка.
+        """
+        rows = {}
+        lookup = 'gt' if newer else 'lt'
+        for queryset, (date_field, id_field) in self.sources:
+            if pub_date is None:
+                queryset = queryset.filter(**{f'{date_field}__isnull': False})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{date_field}__{lookup}e': pub_date}),
+                    Q(**{f'{date_field}__{lookup}': pub_date})
+                    | Q(**{f'{id_field}__{lookup}': pk})
+                )
+            ordering = (F(date_field), F(id_field))
+            queryset = queryset.order_by(*(
+                field.asc() if newer else field.desc() for field in ordering
+            ))
+            for row in queryset[:self.per_page + 1]:
+                rows[row.id] = row
+        return sorted(
+            rows.values(),
+            key=lambda row: (getattr(row, self.date_field), row.id),
+            reverse=not newer
+        )[:self.per_page + 1]
+
+    def _build_page(self, rows, has_newer, has_older):
+        self._number = 2 if has_newer and rows else 1
+        if self._number > 1:
+            self.previous_cursor = encode_cursor(rows[0], self.date_field)
+        if has_older and rows:
+            self.next_cursor = encode_cursor(rows[-1], self.date_field)
+        return self._get_page(rows, self._number, self)
+
+
+class LazyPage(Page):
+    """Страница KeysetPaginator, загружаемая при первом обращении."""
+
+    def __init__(self, paginator, after, before):
+        self.paginator = paginator
+        self._cursors = (after, before)
+        self._page = None
+
+    def _load(self):
+        if self._page is None:
+            self._page = self.paginator.get_page(*self._cursors)
+        return self._page
+
+    @property
+    def object_list(self):
+        return self._load().object_list
+
+    @property
+    def number(self):
+        return self._load().number
@@ -0,0 +1,192 @@
+"""
+Полнотекстовый поиск по записям и комментариям на SQLite FTS5.
+
+Тексты записей и комментариев хранятся в виртуальных таблицах
+posts_post_fts и posts_comment_fts с rowid, равным id объекта; сигналы
+поддерживают их в актуальном состоянии, а команда rebuild_search_index
+перестраивает целиком. Выдача ранжируется по bm25 и листается по
+курсору (rank, post_id) без OFFSET.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Post
+
+POST_TABLE = 'posts_post_fts'
+COMMENT_TABLE = 'posts_comment_fts'
+BATCH_SIZE = 1000
+WORD = re.compile(r'\w+')
+
+
+def match_query(query):
+    """
+    Безопасный запрос FTS5: каждое слово — префиксная фраза, слова
+    объединяются по И. Для запроса без слов возвращает пустую строку.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query))
+
+
+def index_post(post):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {POST_TABLE} WHERE rowid = %s', [post.pk]
+        )
+        cursor.execute(
+            f'INSERT INTO {POST_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text]
+        )
+
+
+def index_comment(comment):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {COMMENT_TABLE} WHERE rowid = %s', [comment.pk]
+        )
+        cursor.execute(
+            f'INSERT INTO {COMMENT_TABLE} (rowid, text, post_id) '
+            'VALUES (%s, %s, %s)',
+            [comment.pk, comment.text, comment.post_id]
+        )
+
+
+def unindex(table, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [pk])
+
+
+def insert_batch(cursor, sql, batch):
+    # Без транзакции SQLite фиксирует на диск каждую строку отдельно.
+    with transaction.atomic():
+        cursor.executemany(sql, batch)
+
+
+def rebuild():
+    """
+    Перестраивает индекс пачками.
+    Возвращает число проиндексированных записей и комментариев.
+    """
+    return index_after(0, 0)
+
+
+def index_after(post_id, comment_id):
+    """
+    Переиндексирует пачками записи с id больше post_id и комментарии с
+    id больше comment_id, например загруженные одним импортом; остальной
+    индекс не трогается. Возвращает число проиндексированных записей и
+    комментариев.
+    """
+    counts = []
+    with connection.cursor() as cursor:
+        for table, after, rows, sql in (
+            (
+                POST_TABLE,
+                post_id,
+                Post.objects.values_list('id', 'text'),
+                f'INSERT INTO {POST_TABLE} (rowid, text) VALUES (%s, %s)',
+            ),
+            (
+                COMMENT_TABLE,
+                comment_id,
+                Comment.objects.values_list('id', 'text', 'post_id'),
+                f'INSERT INTO {COMMENT_TABLE} (rowid, text, post_id) '
+                'VALUES (%s, %s, %s)',
+            ),
+        ):
+            cursor.execute(f'DELETE FROM {table} WHERE rowid > %s', [after])
+            batch = []
+            count = 0
+            rows = rows.filter(pk__gt=after).order_by()
+            for row in rows.iterator(chunk_size=BATCH_SIZE):
+                batch.append(row)
+                if len(batch) == BATCH_SIZE:
+                    insert_batch(cursor, sql, batch)
+                    count += len(batch)
+                    batch = []
+            insert_batch(cursor, sql, batch)
+            counts.append(count + len(batch))
+    return tuple(counts)
+
+
+def matching_ids(table, query):
+    """
+    Подзапрос rowid объектов таблицы table, подходящих под запрос (для
+    админки): pk__in с ним выполняется в базе одним запросом, без
+    выгрузки списка id. Для запроса без слов возвращает None.
+    """
+    match = match_query(query)
+    if not match:
+        return None
+    return RawSQL(
+        f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match]
+    )
+
+
+def decode_cursor(cursor):
+    try:
+        rank, pk = cursor.split('_')
+        return float(rank), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def encode_cursor(rank, pk):
+    return f'{rank!r}_{pk}'
+
+
+def search(query, per_page, after=None, before=None):
+    """
+    Страница результатов поиска: список записей, курсор предыдущей и
+    курсор следующей страницы (None, если страницы нет).
+
+    Запись ранжируется по лучшему совпадению среди её текста и
+    комментариев к ней.
+    """
+    match = match_query(query)
+    if not match:
+        return [], None, None
+    newer = False
+    key = decode_cursor(before)
+    if key is not None:
+        newer = True
+    else:
+        key = decode_cursor(after)
+    having = ''
+    params = [match, match]
+    if key is not None:
+        sign = '<' if newer else '>'
+        having = f'HAVING best {sign} %s OR (best = %s AND post_id {sign} %s)'
+        params += [key[0], key[0], key[1]]
+    direction = 'DESC' if newer else 'ASC'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            SELECT post_id, MIN(rank) AS best FROM (
+                SELECT rowid AS post_id, bm25({POST_TABLE}) AS rank
+                FROM {POST_TABLE} WHERE {POST_TABLE} MATCH %s
+                UNION ALL
+                SELECT post_id, bm25({COMMENT_TABLE}) AS rank
+                FROM {COMMENT_TABLE} WHERE {COMMENT_TABLE} MATCH %s
+            )
+            GROUP BY post_id {having}
+            ORDER BY best {direction}, post_id {direction}
+            LIMIT %s
+            ''',
+            params + [per_page + 1]
+        )
+        rows = cursor.fetchall()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if newer:
+        rows.reverse()
+        if not has_more:
+            return search(query, per_page)
+    posts = Post.objects.for_feed().in_bulk([pk for pk, _ in rows])
+    results = [posts[pk] for pk, _ in rows if pk in posts]
+    previous_cursor = next_cursor = None
+    if rows and key is not None:
+        previous_cursor = encode_cursor(rows[0][1], rows[0][0])
+    if rows and (has_more or newer):
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return results, previous_cursor, next_cursor
@@ -0,0 +1,140 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, feed_cache, search, stream, timeline
+from .models import Comment, Counters, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=User)
+def create_counters(sender, instance, created, **kwargs):
+    """У нового пользователя заводятся нулевые счётчики."""
+    if created:
+        Counters.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change(instance.author_id, posts=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change(instance.author_id, posts=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change(instance.author_id, followers=1)
+        counters.change(instance.user_id, following=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change(instance.author_id, followers=-1)
+    counters.change(instance.user_id, following=-1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    """Новая запись попадает в ленты подписчиков автора."""
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def notify_followers(sender, instance, created, **kwargs):
+    """О новой записи узнают открытые SSE-потоки подписчиков."""
+    if created:
+        transaction.on_commit(lambda: stream.publish(instance))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    """После подписки в ленте появляются прежние записи автора."""
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clean_up_timeline(sender, instance, **kwargs):
+    """После отписки записи автора пропадают из ленты."""
+    timeline.clean_up(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    """Запоминает прежнюю группу, чтобы сбросить и её ленту."""
+    instance._previous_group_id = None
+    if instance.pk is not None:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    feed_cache.bump(*feed_cache.post_scopes(
+        instance, getattr(instance, '_previous_group_id', None)
+    ))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    """
+    Лента показывает число комментариев к записи, страница записи — сами
+    комментарии.
+    """
+    feed_cache.bump(f'comments:{instance.post_id}')
+    try:
+        post = instance.post
+    except Post.DoesNotExist:
+        return
+    feed_cache.bump(*feed_cache.post_scopes(post))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    """Название группы показывается в карточках её записей."""
+    authors = Post.objects.filter(group=instance.pk).values_list(
+        'author_id', flat=True
+    ).order_by().distinct()
+    feed_cache.bump(
+        'index',
+        f'group:{instance.pk}',
+        *(f'author:{author_id}' for author_id in authors)
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_author_cards(sender, instance, **kwargs):
+    """Карточка автора показывает число подписчиков и подписок."""
+    feed_cache.bump(
+        f'counters:{instance.author_id}', f'counters:{instance.user_id}'
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex(search.POST_TABLE, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.unindex(search.COMMENT_TABLE, instance.pk)
@@ -0,0 +1,91 @@
+"""
+Server-Sent Events о новых записях авторов, на которых подписан
+пользователь.
+
+Поток ждёт событий брокера и раз в SSE_HEARTBEAT секунд шлёт
+комментарий, чтобы прокси не закрывали соединение. Через
+SSE_STREAM_TIMEOUT секунд поток завершается, клиент переподключается с
+Last-Event-ID (id последней полученной записи) и получает пропущенное
+одним запросом; заодно подхватываются новые подписки.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.template.defaultfilters import truncatewords
+from django.urls import reverse
+
+from .broker import Busy, broker
+from .models import Follow, Post
+
+RESUME_LIMIT = 50
+
+
+def event_data(post):
+    """Полезная нагрузка события о записи."""
+    username = post.author.username
+    return json.dumps({
+        'id': post.id,
+        'author': username,
+        'text': truncatewords(post.text, 20),
+        'url': reverse('posts:post', args=[username, post.id]),
+    }, ensure_ascii=False)
+
+
+def publish(post):
+    broker.publish(post.id, post.author_id, event_data(post))
+
+
+def message(post_id, data):
+    return f'id: {post_id}\nevent: post\ndata: {data}\n\n'
+
+
+def missed(authors, last_event_id):
+    """Записи авторов новее last_event_id, от старых к новым."""
+    posts = Post.objects.filter(
+        author__in=authors, id__gt=last_event_id
+    ).select_related('author').order_by('-id')[:RESUME_LIMIT]
+    return reversed(posts)
+
+
+def follow_events(user, last_event_id=None):
+    """
+    Генератор сообщений SSE для пользователя. Соединение учитывается в
+    пределе SSE_MAX_CONNECTIONS, пока генератор не закрыт; если предел
+    уже достигнут, поток сразу завершается.
+    """
+    try:
+        with broker.subscription(settings.SSE_MAX_CONNECTIONS):
+            yield from events(user, last_event_id)
+    except Busy:
+        return
+
+
+def events(user, last_event_id):
+    authors = set(
+        Follow.objects.filter(user=user).values_list('author', flat=True)
+    )
+    seq = broker.seq
+    sent = set()
+    yield f'retry: {settings.SSE_RETRY * 1000}\n\n'
+    if last_event_id is not None:
+        for post in missed(authors, last_event_id):
+            sent.add(post.id)
+            yield message(post.id, event_data(post))
+    written = time.monotonic()
+    deadline = written + settings.SSE_STREAM_TIMEOUT
+    while time.monotonic() < deadline:
+        # Ждём не дольше, чем до следующего пульса: события чужих авторов
+        # будят цикл, но в поток ничего не пишут.
+        new = broker.wait(
+            seq, max(written + settings.SSE_HEARTBEAT - time.monotonic(), 0)
+        )
+        if new:
+            seq = new[-1].seq
+        for event in new:
+            if event.author_id in authors and event.post_id not in sent:
+                written = time.monotonic()
+                yield message(event.post_id, event.data)
+        if time.monotonic() - written >= settings.SSE_HEARTBEAT:
+            written = time.monotonic()
+            yield ': heartbeat\n\n'
@@ -0,0 +1,118 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+@override_settings(API_PAGE_SIZE=2)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Запись {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'posts:{name}', args=args), params)
+
+    def test_posts_cursor_pagination(self):
+        """Список записей листается по курсору от новых к старым."""
+        texts = []
+        params = {}
+        while True:
+            data = self.get('api_posts', **params).json()
+            self.assertLessEqual(len(data['results']), 2)
+            texts += [post['text'] for post in data['results']]
+            if data['next'] is None:
+                break
+            params = {'after': data['next']}
+        self.assertEqual(
+            texts, [f'Запись {number}' for number in reversed(range(5))]
+        )
+
+    def test_sparse_fields(self):
+        """fields= оставляет в ответе и в запросе только нужные поля."""
+        with self.assertNumQueries(1) as queries:
+            data = self.get('api_posts', fields='id,text').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        sql = queries.captured_queries[0]['sql']
+        self.assertNotIn('auth_user', sql)
+        self.assertNotIn('posts_comment', sql)
+        data = self.get(
+            'api_post', ApiTests.posts[0].id, fields='author,comments_count'
+        ).json()
+        self.assertEqual(data, {'author': 'author', 'comments_count': 1})
+
+    def test_ids_lookup(self):
+        """ids= отдаёт объекты в порядке запроса одним запросом."""
+        first, second = ApiTests.posts[1].id, ApiTests.posts[3].id
+        with self.assertNumQueries(1):
+            data = self.get(
+                'api_posts', ids=f'{second},{first},0', fields='id'
+            ).json()
+        self.assertEqual(data['results'], [{'id': second}, {'id': first}])
+
+    def test_other_resources(self):
+        """Сообщества, профили, комментарии и подписки."""
+        self.assertEqual(
+            self.get('api_group', 'group', fields='title').json(),
+            {'title': 'Группа'}
+        )
+        self.assertEqual(
+            self.get('api_profile', 'author', fields='followers,posts').json(),
+            {'followers': 1, 'posts': 5}
+        )
+        comments = self.get(
+            'api_comments', ApiTests.posts[0].id, fields='author,text'
+        ).json()
+        self.assertEqual(
+            comments['results'], [{'author': 'reader', 'text': 'Комментарий'}]
+        )
+        for name, username in (
+            ('api_followers', 'author'), ('api_following', 'reader')
+        ):
+            with self.subTest(name=name):
+                data = self.get(name, username, fields='user,author').json()
+                self.assertEqual(
+                    data['results'], [{'user': 'reader', 'author': 'author'}]
+                )
+        self.assertEqual(len(self.get('api_groups').json()['results']), 1)
+
+    def test_errors(self):
+        """Некорректные параметры — 400, отсутствующий объект — 404."""
+        responses = {
+            self.get('api_posts', fields='password'): 400,
+            self.get('api_posts', after='not-a-cursor'): 400,
+            self.get('api_posts', ids='1,x'): 400,
+            self.get('api_profile', 'missing'): 404,
+            self.get('api_comments', 0): 404,
+        }
+        for response, status in responses.items():
+            with self.subTest(status=status):
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
+
+    def test_etag(self):
+        """Повторный запрос с тем же ETag получает 304."""
+        url = reverse('posts:api_posts')
+        response = self.client.get(url)
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        Post.objects.create(text='Новая запись', author=ApiTests.author)
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
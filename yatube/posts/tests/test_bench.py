@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from posts import bench
+from posts.models import Follow, Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BenchTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_posts_per_author_follow_zipf(self):
+        """Число записей на автора убывает с рангом автора."""
+        rows = bench.synthetic_rows(
+            users=50, posts=2000, follows=0, comments=0, images=0, seed=1
+        )
+        per_author = Counter(
+            row['author'] for row in rows if row['type'] == 'post'
+        )
+        ranked = [count for _, count in per_author.most_common()]
+        self.assertEqual(per_author.most_common(1)[0][0], 1)
+        self.assertGreater(ranked[0], 10 * ranked[-1])
+
+    def test_follow_pairs_up_to_every_pair(self):
+        """Подписок может быть сколько угодно до всех возможных пар."""
+        users = 8
+        for follows in (users * (users - 1) - 1, users * users):
+            with self.subTest(follows=follows):
+                pairs = [
+                    (row['user'], row['author'])
+                    for row in bench.synthetic_rows(
+                        users=users, posts=0, follows=follows, comments=0,
+                        images=0, seed=1
+                    )
+                    if row['type'] == 'follow'
+                ]
+                self.assertEqual(
+                    len(pairs), min(follows, users * (users - 1))
+                )
+                self.assertEqual(len(set(pairs)), len(pairs))
+                self.assertFalse(
+                    [pair for pair in pairs if pair[0] == pair[1]]
+                )
+
+    def test_seed_refuses_non_empty_database(self):
+        """Стенд не загружает данные в базу, где они уже есть."""
+        User.objects.create(username='real')
+        with self.assertRaisesMessage(CommandError, 'не пуста'):
+            call_command(
+                'bench', users=5, posts=5, follows=0, comments=0, images=0,
+                threads=1, requests=5, stdout=StringIO()
+            )
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_seed_and_run(self):
+        """Стенд загружает данные и замеряет все представления."""
+        result = bench.seed(
+            users=20, posts=100, follows=40, comments=50, images=5,
+            groups=3, seed=1
+        )
+        self.assertEqual(result['counts']['post'], 100)
+        self.assertEqual(Follow.objects.count(), 40)
+        self.assertEqual(Post.objects.exclude(image='').count(), 5)
+        report = bench.run(threads=1, requests=40, samples=5, seed=1)
+        self.assertEqual(report['total']['requests'], 40)
+        self.assertEqual(report['total']['errors'], 0)
+        for view in bench.VIEWS:
+            with self.subTest(view=view):
+                self.assertLessEqual(
+                    report[view]['p50_ms'], report[view]['p99_ms']
+                )
+
+    def test_command_compares_with_baseline(self):
+        """Команда сохраняет отчёт и сверяет его с базовым."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        output = os.path.join(directory, 'report.json')
+        call_command(
+            'bench', users=10, posts=50, follows=20, comments=10, images=0,
+            groups=2, threads=1, requests=20, seed=1, output=output,
+            stdout=StringIO()
+        )
+        with open(output, encoding='utf-8') as report:
+            baseline = json.load(report)
+        for view in baseline['views'].values():
+            view['queries_per_request'] /= 10
+        path = os.path.join(directory, 'baseline.json')
+        with open(path, 'w', encoding='utf-8') as report:
+            json.dump(baseline, report)
+        with self.assertRaises(CommandError):
+            call_command(
+                'bench', skip_seed=True, threads=1, requests=20, seed=1,
+                baseline=path, stdout=StringIO()
+            )
+
+    def test_isolated_from_server_files(self):
+        """Кэш и картинки стенда — во временных каталогах, не в рабочих."""
+        location = settings.CACHES['default']['LOCATION']
+        with bench.isolated():
+            media = settings.MEDIA_ROOT
+            self.assertNotEqual(media, MEDIA_ROOT)
+            self.assertNotEqual(
+                settings.CACHES['default']['LOCATION'], location
+            )
+            self.assertTrue(os.path.isfile(
+                os.path.join(media, bench.image_names()[0])
+            ))
+        self.assertFalse(os.path.exists(media))
+        self.assertEqual(settings.CACHES['default']['LOCATION'], location)
+
+    def test_percentile(self):
+        self.assertEqual(bench.percentile(range(1, 101), 95), 95)
+        self.assertEqual(bench.percentile([5], 99), 5)
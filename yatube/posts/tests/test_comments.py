@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Post, User
+
+COMMENTS = 5
+
+
+@override_settings(NUMBER_OF_COMMENTS=2)
+class CommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(text='Запись', author=cls.author)
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create(username=f'reader{i}'),
+                text=f'Комментарий {i}'
+            )
+            for i in range(COMMENTS)
+        ]
+        cls.post_url = reverse('posts:post', args=[cls.author, cls.post.id])
+        cls.comments_url = reverse(
+            'posts:comments', args=[cls.author, cls.post.id]
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_post_page_shows_first_comments(self):
+        """Страница записи показывает только первую страницу комментариев."""
+        response = self.client.get(CommentsPaginationTests.post_url)
+        comments = response.context['comments']
+        self.assertEqual(
+            list(comments),
+            CommentsPaginationTests.comments[::-1][:2]
+        )
+        self.assertContains(
+            response,
+            f'?after={comments.paginator.next_cursor}'
+        )
+
+    def test_fragment_pages_through_all_comments(self):
+        """Фрагмент комментариев отдаёт все страницы без повторов."""
+        comments = self.client.get(
+            CommentsPaginationTests.post_url
+        ).context['comments']
+        seen = list(comments)
+        cursor = comments.paginator.next_cursor
+        while cursor:
+            response = self.client.get(
+                CommentsPaginationTests.comments_url, {'after': cursor}
+            )
+            self.assertTemplateNotUsed(response, 'base.html')
+            comments = response.context['comments']
+            seen.extend(comments)
+            cursor = comments.paginator.next_cursor
+        self.assertEqual(seen, CommentsPaginationTests.comments[::-1])
+
+    def test_fragment_queries_do_not_grow(self):
+        """Авторы комментариев читаются тем же запросом."""
+        with self.assertNumQueries(2):
+            self.client.get(CommentsPaginationTests.comments_url)
+
+    def test_fragment_cache_invalidated_by_new_comment(self):
+        """Новый комментарий сразу виден во фрагменте."""
+        self.client.get(CommentsPaginationTests.comments_url)
+        Comment.objects.create(
+            post=CommentsPaginationTests.post,
+            author=CommentsPaginationTests.author,
+            text='Свежий комментарий'
+        )
+        response = self.client.get(CommentsPaginationTests.comments_url)
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_fragment_for_missing_post(self):
+        """Для несуществующей записи фрагмент отвечает 404."""
+        response = self.client.get(
+            reverse('posts:comments', args=['author', 0])
+        )
+        self.assertEqual(response.status_code, 404)
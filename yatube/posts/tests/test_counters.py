@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Counters, Follow, Post, User
+
+POST_TEXT = 'Текст тестового поста'
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+
+    def counters(self, user):
+        return Counters.objects.get(user=user)
+
+    def test_posts_counter(self):
+        """Счётчик записей меняется при создании и удалении записи."""
+        post = Post.objects.create(text=POST_TEXT, author=CountersTests.author)
+        self.assertEqual(self.counters(CountersTests.author).posts, 1)
+        post.delete()
+        self.assertEqual(self.counters(CountersTests.author).posts, 0)
+
+    def test_follow_counters(self):
+        """Счётчики подписчиков и подписок меняются при (от)подписке."""
+        Follow.objects.create(
+            user=CountersTests.reader, author=CountersTests.author
+        )
+        self.assertEqual(self.counters(CountersTests.author).followers, 1)
+        self.assertEqual(self.counters(CountersTests.reader).following, 1)
+        Follow.objects.filter(user=CountersTests.reader).delete()
+        self.assertEqual(self.counters(CountersTests.author).followers, 0)
+        self.assertEqual(self.counters(CountersTests.reader).following, 0)
+
+    def test_reconcile_counters_fixes_drift(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        Post.objects.bulk_create(
+            Post(text=POST_TEXT, author=CountersTests.author)
+            for _ in range(3)
+        )
+        Counters.objects.filter(user=CountersTests.reader).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.counters(CountersTests.author).posts, 3)
+        self.assertEqual(self.counters(CountersTests.reader).posts, 0)
+
+    def test_author_card_without_count_queries(self):
+        """Карточка автора не выполняет агрегирующих запросов."""
+        Post.objects.create(text=POST_TEXT, author=CountersTests.author)
+        with CaptureQueriesContext(connection) as context:
+            response = Client().get(
+                reverse('posts:profile', args=[CountersTests.author])
+            )
+        self.assertContains(response, 'Записей: 1')
+        self.assertFalse(
+            any(
+                query['sql'].startswith('SELECT COUNT(')
+                for query in context
+            )
+        )
@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.export import CHUNK_SIZE
+from posts.models import Comment, Group, Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+IMAGE = os.urandom(3 * CHUNK_SIZE)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.other = User.objects.create(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Запись с картинкой',
+            author=cls.author,
+            group=cls.group,
+            image=SimpleUploadedFile('big.png', IMAGE)
+        )
+        cls.plain = Post.objects.create(
+            text='Просто запись', author=cls.author
+        )
+        Post.objects.create(text='Чужая запись', author=cls.other)
+        Comment.objects.create(
+            post=cls.plain, author=cls.author, text='Свой комментарий'
+        )
+        Comment.objects.create(
+            post=cls.plain, author=cls.other, text='Чужой комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(ExportTests.author)
+
+    def test_export_requires_login(self):
+        """Выгрузка доступна только авторизованному пользователю."""
+        response = Client().get(reverse('posts:export'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_streams_user_data(self):
+        """Архив отдаётся потоком и содержит только данные пользователя."""
+        response = self.client.get(reverse('posts:export'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        archive = zipfile.ZipFile(BytesIO(b''.join(chunks)))
+        self.assertIsNone(archive.testzip())
+        posts = [
+            json.loads(line)
+            for line in archive.read('posts.jsonl').decode().splitlines()
+        ]
+        self.assertEqual(
+            [post['text'] for post in posts],
+            ['Запись с картинкой', 'Просто запись']
+        )
+        self.assertEqual(posts[0]['group'], 'group')
+        self.assertEqual(archive.read(posts[0]['image']), IMAGE)
+        self.assertIsNone(posts[1]['image'])
+        comments = archive.read('comments.jsonl').decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['text'] for line in comments],
+            ['Свой комментарий']
+        )
@@ -0,0 +1,137 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import feed_cache
+from posts.models import Group, Post, User
+
+
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='Запись в группе', author=cls.author, group=cls.group
+        )
+        Post.objects.create(
+            text='Чужая запись', author=User.objects.create(username='other')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_list_posts(self):
+        """Ленты RSS и Atom содержат записи своей области."""
+        urls = {
+            reverse('posts:index_rss'): ('Запись в группе', 'Чужая запись'),
+            reverse('posts:index_atom'): ('Запись в группе', 'Чужая запись'),
+            reverse('posts:group_rss', args=['group']): ('Запись в группе',),
+            reverse('posts:group_atom', args=['group']): ('Запись в группе',),
+            reverse('posts:author_rss', args=['author']): (
+                'Запись в группе',
+            ),
+            reverse('posts:author_atom', args=['author']): (
+                'Запись в группе',
+            ),
+        }
+        for url, texts in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('xml', response['Content-Type'])
+                for text in texts:
+                    self.assertContains(response, text)
+                if len(texts) == 1:
+                    self.assertNotContains(response, 'Чужая запись')
+
+    def test_missing_feed_object(self):
+        """Лента несуществующего сообщества или автора отвечает 404."""
+        for url in (
+            reverse('posts:group_rss', args=['missing']),
+            reverse('posts:author_atom', args=['missing']),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_conditional_requests(self):
+        """Повторный запрос с ETag или Last-Modified получает 304."""
+        url = reverse('posts:group_rss', args=['group'])
+        response = self.client.get(url)
+        with self.assertNumQueries(2):
+            cached = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(cached.status_code, 304)
+        cached = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_changes_reset_last_modified(self):
+        """
+        Правка записи и переименование сообщества не дают 304 по
+        Last-Modified, хотя дата новейшей записи не меняется.
+        """
+        url = reverse('posts:group_rss', args=['group'])
+        for later, change in (
+            (10, lambda: Post.objects.get(pk=FeedsTests.post.pk).save()),
+            (20, lambda: Group.objects.get(pk=FeedsTests.group.pk).save()),
+        ):
+            last_modified = self.client.get(url)['Last-Modified']
+            with mock.patch.object(
+                feed_cache.time, 'time', return_value=time.time() + later
+            ):
+                change()
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_feed_body_is_cached(self):
+        """Без условных заголовков лента отдаётся из кэша."""
+        url = reverse('posts:index_rss')
+        first = self.client.get(url)
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_changes_reset_feed(self):
+        """Новая и изменённая запись меняют ETag и содержимое ленты."""
+        url = reverse('posts:author_rss', args=['author'])
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(text='Новая запись', author=FeedsTests.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новая запись')
+        etag = response['ETag']
+        post = Post.objects.get(pk=FeedsTests.post.pk)
+        post.text = 'Исправленная запись'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленная запись')
+
+    def test_pages_link_feeds(self):
+        """Страницы лент ссылаются на свои RSS и Atom."""
+        pages = {
+            reverse('posts:index'): reverse('posts:index_rss'),
+            reverse('posts:group_posts', args=['group']): reverse(
+                'posts:group_atom', args=['group']
+            ),
+            reverse('posts:profile', args=['author']): reverse(
+                'posts:author_rss', args=['author']
+            ),
+        }
+        for page, feed in pages.items():
+            with self.subTest(page=page):
+                self.assertContains(
+                    self.client.get(page), f'href="{feed}"'
+                )
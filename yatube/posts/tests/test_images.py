@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts import images
+from posts.models import Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CAMERA_MAKE = 0x010F
+
+
+def jpeg_with_exif(size):
+    exif = Image.Exif()
+    exif[CAMERA_MAKE] = 'Camera'
+    content = BytesIO()
+    Image.new('RGB', size, color=(0, 128, 255)).save(
+        content, 'jpeg', exif=exif
+    )
+    return SimpleUploadedFile('photo.jpg', content.getvalue(), 'image/jpeg')
+
+
+def animated_gif(size, colors=('red', 'green', 'blue')):
+    frames = [Image.new('RGB', size, color=color) for color in colors]
+    content = BytesIO()
+    frames[0].save(
+        content, 'gif', save_all=True, append_images=frames[1:],
+        duration=100, loop=0
+    )
+    return SimpleUploadedFile('anim.gif', content.getvalue(), 'image/gif')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageVariantsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(ImageVariantsTests.author)
+        self.client.post(
+            reverse('posts:new_post'),
+            {'text': 'Фото', 'image': jpeg_with_exif((3000, 1500))}
+        )
+        self.post = Post.objects.get()
+
+    def test_upload_is_normalized(self):
+        """Загруженное изображение без EXIF и не больше MAX_DIMENSION."""
+        with default_storage.open(self.post.image.name) as stored:
+            image = Image.open(stored)
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(max(image.size), images.MAX_DIMENSION)
+            self.assertNotIn(CAMERA_MAKE, image.getexif())
+
+    def test_variants_in_feed(self):
+        """Лента отдаёт варианты через srcset с ленивой загрузкой."""
+        call_command(
+            'process_thumbnails', workers=0, once=True, stdout=StringIO()
+        )
+        self.post.refresh_from_db()
+        formats = self.post.image_formats.split(',')
+        self.assertIn('WEBP', formats)
+        for image_format in formats:
+            for width in images.WIDTHS:
+                name = images.variant_name(
+                    self.post.image.name, width, image_format
+                )
+                with default_storage.open(name) as variant:
+                    self.assertEqual(
+                        Image.open(variant).size,
+                        (width, round(width * images.ASPECT))
+                    )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(
+            response, images.srcset(self.post.image.name, 'WEBP')
+        )
+        self.assertContains(response, 'loading="lazy"')
+
+
+class NormalizeTests(TestCase):
+    def test_clean_image_is_kept_as_is(self):
+        """Изображение без EXIF и в пределах MAX_DIMENSION не меняется."""
+        upload = animated_gif((40, 20))
+        original = upload.read()
+        upload.seek(0)
+        normalized = images.normalize(upload)
+        self.assertEqual(normalized.read(), original)
+
+    def test_animation_keeps_all_frames(self):
+        """У уменьшенной анимации сохраняются все кадры."""
+        normalized = images.normalize(
+            animated_gif((images.MAX_DIMENSION * 2, 20))
+        )
+        image = Image.open(normalized)
+        self.assertEqual(image.format, 'GIF')
+        self.assertEqual(image.n_frames, 3)
+        self.assertEqual(max(image.size), images.MAX_DIMENSION)
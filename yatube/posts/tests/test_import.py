@@ -0,0 +1,170 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from posts import search
+from posts.models import (Comment, Counters, Follow, Group, Post,
+                          TimelineEntry, User)
+
+POSTS = 30
+PUB_DATE = '2020-05-01T12:30:00'
+
+
+def rows(suffix=''):
+    yield {'type': 'user', 'id': 1, 'username': f'writer{suffix}'}
+    yield {'type': 'user', 'id': 2, 'username': f'reader{suffix}'}
+    yield {
+        'type': 'group', 'id': 1, 'title': 'Книги', 'slug': f'books{suffix}'
+    }
+    for number in range(1, POSTS + 1):
+        yield {
+            'type': 'post',
+            'id': number,
+            'author': 1,
+            'group': 1,
+            'text': f'Импортированная запись {number}',
+            'pub_date': PUB_DATE,
+        }
+    yield {
+        'type': 'comment',
+        'id': 1,
+        'post': 1,
+        'author': 2,
+        'text': 'Импортированный комментарий',
+        'created': '2020-05-02T08:00:00+03:00',
+    }
+    yield {'type': 'follow', 'user': 2, 'author': 1}
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, lines, name='data.jsonl'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            for line in lines:
+                output.write(json.dumps(line, ensure_ascii=False) + '\n')
+        return path
+
+    def import_rows(self, lines, batch_size=10):
+        output = StringIO()
+        call_command(
+            'import_yatube',
+            self.write(lines),
+            batch_size=batch_size,
+            stdout=output
+        )
+        return output.getvalue()
+
+    def test_import_keeps_data_and_timestamps(self):
+        """Загрузка сохраняет связи и исходные даты."""
+        output = self.import_rows(rows())
+        self.assertIn('в секунду', output)
+        writer = User.objects.get(username='writer')
+        reader = User.objects.get(username='reader')
+        self.assertEqual(writer.posts.count(), POSTS)
+        self.assertEqual(
+            set(writer.posts.values_list('group__slug', flat=True)),
+            {'books'}
+        )
+        self.assertEqual(
+            set(writer.posts.values_list('pub_date', flat=True)),
+            {datetime(2020, 5, 1, 12, 30, tzinfo=timezone.utc)}
+        )
+        comment = Comment.objects.get()
+        self.assertEqual(comment.author, reader)
+        self.assertEqual(
+            comment.created,
+            datetime(2020, 5, 2, 5, 0, tzinfo=timezone.utc)
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=writer).exists()
+        )
+
+    def test_import_updates_derived_data(self):
+        """После загрузки верны счётчики, ленты и поисковый индекс."""
+        self.import_rows(rows())
+        writer = User.objects.get(username='writer')
+        reader = User.objects.get(username='reader')
+        self.assertEqual(Counters.objects.get(user=writer).posts, POSTS)
+        self.assertEqual(Counters.objects.get(user=writer).followers, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=reader).count(), POSTS
+        )
+        results, _, _ = search.search('импортированный', 10)
+        self.assertEqual([post.author for post in results], [writer])
+
+    def test_ids_are_shifted_past_existing_rows(self):
+        """Повторная загрузка с теми же id не конфликтует с прежней."""
+        self.import_rows(rows())
+        self.import_rows(rows(suffix='2'))
+        self.assertEqual(Post.objects.count(), 2 * POSTS)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(
+            User.objects.get(username='writer2').posts.count(), POSTS
+        )
+
+    def test_writes_in_batches(self):
+        """Строки пишутся пачками, а не по одной."""
+        with CaptureQueriesContext(connection) as context:
+            self.import_rows(rows(), batch_size=1000)
+        inserts = [
+            query for query in context
+            if query['sql'].startswith('INSERT INTO "posts_post"')
+        ]
+        self.assertEqual(len(inserts), 1)
+
+    def test_invalid_line(self):
+        """Некорректная строка останавливает загрузку с номером строки."""
+        for line in (
+            {'type': 'user', 'id': 1},
+            {'type': 'unknown'},
+            {'type': 'user', 'id': 'x', 'username': 'user'},
+            {'type': 'post', 'id': 1, 'author': 1, 'text': 'Текст',
+             'pub_date': 'вчера'},
+        ):
+            with self.subTest(line=line):
+                with self.assertRaisesMessage(CommandError, 'строка 1'):
+                    self.import_rows([line])
+
+    def test_derived_data_only_for_imported_rows(self):
+        """После загрузки индексируются только загруженные записи."""
+        author = User.objects.create(username='existing')
+        post = Post.objects.create(
+            text='Импортированная заранее', author=author
+        )
+        search.unindex(search.POST_TABLE, post.pk)
+        self.import_rows(rows())
+        results, _, _ = search.search('импортированная', 50)
+        self.assertNotIn(post, results)
+        self.assertEqual(len(results), POSTS)
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_interrupted_import_keeps_derived_data(self):
+        """
+        Ошибка посреди загрузки не оставляет записанные пачки без
+        счётчиков, лент и поискового индекса.
+        """
+        lines = list(rows())
+        lines.insert(20, {'type': 'unknown'})
+        with self.assertRaisesMessage(CommandError, 'строка 21'):
+            self.import_rows(lines)
+        writer = User.objects.get(username='writer')
+        reader = User.objects.get(username='reader')
+        imported = writer.posts.count()
+        self.assertTrue(imported)
+        self.assertEqual(Counters.objects.get(user=writer).posts, imported)
+        self.assertFalse(TimelineEntry.objects.filter(user=reader).exists())
+        results, _, _ = search.search('импортированная', 50)
+        self.assertEqual(len(results), imported)
@@ -0,0 +1,96 @@
+import gzip
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Follow, Group, Post, User
+
+GROUP_SLUG = 'test-slug'
+POST_TEXT = 'Текст тестового поста'
+NEW_POST_TEXT = 'Текст новой записи'
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Группа', slug=GROUP_SLUG, description='Описание'
+        )
+        cls.user = User.objects.create(username='author')
+        cls.post = Post.objects.create(
+            text=POST_TEXT, author=cls.user, group=cls.group
+        )
+        cls.URLS = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': GROUP_SLUG}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_second_request_is_served_from_cache(self):
+        """Повторный анонимный запрос не рендерит страницу заново."""
+        for url in AnonymousPageCacheTests.URLS:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                self.assertIsNotNone(first.context)
+                second = self.guest_client.get(url)
+                self.assertIsNone(second.context)
+                self.assertEqual(first.content, second.content)
+                self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_conditional_request_returns_not_modified(self):
+        """Запрос с совпадающим ETag или датой получает 304."""
+        url = AnonymousPageCacheTests.URLS[0]
+        response = self.guest_client.get(url)
+        by_etag = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(by_etag.status_code, 304)
+        by_date = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_gzip_body(self):
+        """Клиент, принимающий gzip, получает заранее сжатое тело."""
+        url = AnonymousPageCacheTests.URLS[0]
+        plain = self.guest_client.get(url)
+        compressed = self.guest_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+    def test_writes_invalidate_pages(self):
+        """Новая запись и подписка сбрасывают закэшированные страницы."""
+        for url in AnonymousPageCacheTests.URLS:
+            self.guest_client.get(url)
+        Post.objects.create(
+            text=NEW_POST_TEXT,
+            author=AnonymousPageCacheTests.user,
+            group=AnonymousPageCacheTests.group
+        )
+        for url in AnonymousPageCacheTests.URLS:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), NEW_POST_TEXT)
+        Follow.objects.create(
+            user=User.objects.create(username='reader'),
+            author=AnonymousPageCacheTests.user
+        )
+        self.assertContains(
+            self.guest_client.get(AnonymousPageCacheTests.URLS[2]),
+            'Подписчиков: 1'
+        )
+
+    def test_authorized_user_bypasses_cache(self):
+        """Авторизованный пользователь получает свежую страницу."""
+        url = AnonymousPageCacheTests.URLS[0]
+        self.guest_client.get(url)
+        author_client = Client()
+        author_client.force_login(AnonymousPageCacheTests.user)
+        response = author_client.get(url)
+        self.assertIsNotNone(response.context)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertContains(response, 'Редактировать')
@@ -0,0 +1,109 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+GROUP_SLUG = 'test-slug'
+POST_TEXT = 'Текст тестового поста'
+POSTS_PER_AUTHOR = 15
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?$')
+
+
+class QueryPlansTests(TestCase):
+    """Запросы лент читают данные по индексам, без полного просмотра."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Группа', slug=GROUP_SLUG, description='Описание'
+        )
+        cls.reader = User.objects.create(username='reader')
+        cls.authors = [
+            User.objects.create(username=f'author{i}') for i in range(3)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+            for i in range(POSTS_PER_AUTHOR):
+                post = Post.objects.create(
+                    text=POST_TEXT,
+                    author=author,
+                    group=cls.group if i % 2 else None
+                )
+                Comment.objects.create(
+                    text=POST_TEXT, post=post, author=cls.reader
+                )
+        cls.post = post
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(QueryPlansTests.reader)
+
+    def capture_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        return response, context.captured_queries
+
+    def assert_plans_use_indexes(self, queries):
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    with self.subTest(sql=query['sql']):
+                        self.assertIsNone(FULL_SCAN.match(detail), detail)
+                        self.assertNotIn('TEMP B-TREE', detail)
+
+    def assert_feed_uses_indexes(self, url):
+        """Проверяет первую и следующую страницы ленты."""
+        response, queries = self.capture_queries(url)
+        cursor = response.context['page'].paginator.next_cursor
+        self.assertIsNotNone(cursor)
+        queries += self.capture_queries(url + f'?after={cursor}')[1]
+        self.assert_plans_use_indexes(queries)
+
+    def test_feed_query_plans(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': GROUP_SLUG}),
+            reverse(
+                'posts:profile',
+                kwargs={'username': QueryPlansTests.authors[0].username}
+            ),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            self.assert_feed_uses_indexes(url)
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=0)
+    def test_follow_feed_with_popular_authors_query_plans(self):
+        self.assert_feed_uses_indexes(reverse('posts:follow_index'))
+
+    def test_post_query_plans(self):
+        url = reverse(
+            'posts:post',
+            kwargs={
+                'username': QueryPlansTests.post.author.username,
+                'post_id': QueryPlansTests.post.id
+            }
+        )
+        self.assert_plans_use_indexes(self.capture_queries(url)[1])
+
+    @override_settings(NUMBER_OF_COMMENTS=1)
+    def test_comments_query_plans(self):
+        post = QueryPlansTests.post
+        Comment.objects.create(
+            text=POST_TEXT, post=post, author=QueryPlansTests.reader
+        )
+        url = reverse('posts:comments', args=[post.author.username, post.id])
+        response, queries = self.capture_queries(url)
+        cursor = response.context['comments'].paginator.next_cursor
+        queries += self.capture_queries(url + f'?after={cursor}')[1]
+        self.assert_plans_use_indexes(queries)
@@ -0,0 +1,120 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from posts import search
+from posts.models import Comment, Post, User
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(
+            text='Сегодня пекли яблочный пирог', author=cls.author
+        )
+        cls.other = Post.objects.create(
+            text='Прогулка по осеннему парку', author=cls.author
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.other, author=cls.author, text='Отличный пирог'
+        )
+
+    def found(self, query, **kwargs):
+        response = Client().get(
+            reverse('posts:search'), {'q': query, **kwargs}
+        )
+        return response, [post.pk for post in response.context['posts']]
+
+    def test_search_by_post_and_comment_text(self):
+        """Запись находится по своему тексту и по тексту комментариев."""
+        _, found = self.found('пирог')
+        self.assertCountEqual(
+            found, [SearchTests.post.pk, SearchTests.other.pk]
+        )
+        _, found = self.found('яблоч')
+        self.assertEqual(found, [SearchTests.post.pk])
+
+    def test_empty_and_punctuation_queries(self):
+        """Запрос без слов не ломает страницу и ничего не находит."""
+        for query in ('', '"*:()', 'NEAR(OR'):
+            with self.subTest(query=query):
+                response, found = self.found(query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(found, [])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении записей."""
+        post = Post.objects.create(
+            text='Зимний лес', author=SearchTests.author
+        )
+        self.assertEqual(self.found('зимний')[1], [post.pk])
+        post.text = 'Летний лес'
+        post.save()
+        self.assertEqual(self.found('зимний')[1], [])
+        self.assertEqual(self.found('летний')[1], [post.pk])
+        post.delete()
+        self.assertEqual(self.found('летний')[1], [])
+        SearchTests.comment.delete()
+        self.assertEqual(self.found('отличный')[1], [])
+
+    @override_settings(NUMBER_OF_POSTS=2)
+    def test_cursor_pagination(self):
+        """Страницы результатов листаются курсорами без повторов."""
+        Post.objects.bulk_create(
+            Post(text=f'Кот номер {number}', author=SearchTests.author)
+            for number in range(5)
+        )
+        search.rebuild()
+        response, first = self.found('кот')
+        after = response.context['next_cursor']
+        self.assertIsNone(response.context['previous_cursor'])
+        response, second = self.found('кот', after=after)
+        response, third = self.found(
+            'кот', after=response.context['next_cursor']
+        )
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(len(set(first + second + third)), 5)
+        response, back = self.found(
+            'кот', before=response.context['previous_cursor']
+        )
+        self.assertEqual(back, second)
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.POST_TABLE}')
+            cursor.execute(f'DELETE FROM {search.COMMENT_TABLE}')
+        self.assertEqual(self.found('пирог')[1], [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.found('пирог')[1]), 2)
+
+    def test_admin_search_uses_index(self):
+        """
+        Поиск в админке находит записи по индексу подзапросом, не
+        выгружая список id.
+        """
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                reverse('admin:posts_post_changelist'), {'q': 'яблоч'}
+            )
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            [SearchTests.post.pk]
+        )
+        matches = [
+            query['sql'] for query in queries
+            if search.POST_TABLE in query['sql']
+        ]
+        self.assertTrue(matches)
+        for sql in matches:
+            self.assertRegex(sql, r'IN \(+SELECT rowid FROM posts_post_fts')
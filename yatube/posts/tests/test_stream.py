@@ -0,0 +1,128 @@
+import threading
+
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+from posts import stream
+from posts.broker import Broker, Busy, broker
+from posts.models import Follow, Post, User
+
+
+class BrokerTests(TestCase):
+    def test_publish_and_wait(self):
+        """Подписчик получает события новее своего номера."""
+        events = Broker()
+        events.publish(1, 10, 'первое')
+        seq = events.seq
+        events.publish(2, 20, 'второе')
+        self.assertEqual(
+            [event.data for event in events.wait(seq, 0)], ['второе']
+        )
+        self.assertEqual(events.wait(events.seq, 0.01), [])
+
+    def test_subscription_limit(self):
+        """Сверх предела подписчиков поднимается Busy."""
+        events = Broker()
+        with events.subscription(1):
+            self.assertEqual(events.subscribers, 1)
+            with self.assertRaises(Busy):
+                with events.subscription(1):
+                    pass
+        self.assertEqual(events.subscribers, 0)
+
+
+@override_settings(SSE_HEARTBEAT=0.01, SSE_STREAM_TIMEOUT=1)
+class FollowStreamTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.stranger = User.objects.create(username='stranger')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.old_post = Post.objects.create(
+            text='Старая запись', author=cls.author
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(FollowStreamTests.reader)
+
+    def open(self, **headers):
+        response = self.client.get(reverse('posts:follow_stream'), **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response, iter(response.streaming_content)
+
+    def test_login_required(self):
+        response = Client().get(reverse('posts:follow_stream'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_pushes_followed_posts(self):
+        """В поток попадают только записи авторов из подписок."""
+        response, chunks = self.open()
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+        stream.publish(Post.objects.create(
+            text='Чужая запись', author=FollowStreamTests.stranger
+        ))
+        post = Post.objects.create(
+            text='Новая запись', author=FollowStreamTests.author
+        )
+        stream.publish(post)
+        chunk = next(chunks).decode()
+        self.assertIn(f'id: {post.id}\n', chunk)
+        self.assertIn('Новая запись', chunk)
+        self.assertEqual(next(chunks), b': heartbeat\n\n')
+        response.close()
+        self.assertEqual(broker.subscribers, 0)
+
+    @override_settings(SSE_HEARTBEAT=0.05)
+    def test_heartbeat_during_foreign_events(self):
+        """
+        Поток чужих событий, которые будят ожидание, не мешает пульсу:
+        он приходит не реже раза в SSE_HEARTBEAT секунд.
+        """
+        response, chunks = self.open()
+        next(chunks)
+        done = threading.Event()
+
+        def flood():
+            while not done.wait(0.002):
+                broker.publish(0, FollowStreamTests.stranger.id, 'чужое')
+
+        flooder = threading.Thread(target=flood)
+        flooder.start()
+        try:
+            self.assertEqual(next(chunks), b': heartbeat\n\n')
+            self.assertEqual(next(chunks), b': heartbeat\n\n')
+        finally:
+            done.set()
+            flooder.join()
+        response.close()
+
+    def test_resume_from_last_event_id(self):
+        """По Last-Event-ID поток досылает пропущенные записи."""
+        response, chunks = self.open(
+            HTTP_LAST_EVENT_ID=str(FollowStreamTests.old_post.id - 1)
+        )
+        next(chunks)
+        self.assertIn('Старая запись', next(chunks).decode())
+        response.close()
+
+    @override_settings(SSE_MAX_CONNECTIONS=0)
+    def test_connection_limit(self):
+        """Сверх предела соединений процесс отвечает 503."""
+        response = self.client.get(reverse('posts:follow_stream'))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+
+class PublishSignalTests(TransactionTestCase):
+    def test_new_post_is_published_after_commit(self):
+        """Новая запись публикуется в брокер после фиксации."""
+        author = User.objects.create(username='author')
+        seq = broker.seq
+        post = Post.objects.create(text='Запись', author=author)
+        events = broker.wait(seq, 0)
+        self.assertEqual([event.post_id for event in events], [post.id])
+        post.save()
+        self.assertEqual(broker.seq, seq + 1)
@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts.models import Post, ThumbnailTask, User
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PLACEHOLDER = 'Изображение обрабатывается'
+THUMBNAIL = 'class="card-img"'
+
+
+def image_file(name='image.png'):
+    content = BytesIO()
+    Image.new('RGB', (50, 50), color=(255, 0, 0)).save(content, 'png')
+    return SimpleUploadedFile(name, content.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(ThumbnailQueueTests.author)
+
+    def process(self):
+        call_command(
+            'process_thumbnails', workers=0, once=True, stdout=StringIO()
+        )
+
+    def test_new_post_shows_placeholder_until_processed(self):
+        """Новая запись с изображением ждёт миниатюру в очереди."""
+        self.client.post(
+            reverse('posts:new_post'),
+            {'text': 'Запись с картинкой', 'image': image_file()}
+        )
+        post = Post.objects.get()
+        self.assertFalse(post.thumbnail_ready)
+        self.assertTrue(ThumbnailTask.objects.filter(post=post).exists())
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, PLACEHOLDER)
+        self.assertNotContains(response, THUMBNAIL)
+
+        self.process()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_ready)
+        self.assertFalse(ThumbnailTask.objects.exists())
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, PLACEHOLDER)
+        self.assertContains(response, THUMBNAIL)
+
+    def test_edit_without_new_image_keeps_thumbnail(self):
+        """Правка текста не ставит готовую миниатюру в очередь заново."""
+        post = Post.objects.create(
+            text='Запись',
+            author=ThumbnailQueueTests.author,
+            image=image_file(),
+            thumbnail_ready=True
+        )
+        self.client.post(
+            reverse('posts:post_edit', args=[post.author, post.id]),
+            {'text': 'Новый текст'}
+        )
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_ready)
+        self.assertFalse(ThumbnailTask.objects.exists())
+
+    def test_broken_image_leaves_queue(self):
+        """Битое изображение убирается из очереди и остаётся заглушкой."""
+        post = Post.objects.create(
+            text='Запись',
+            author=ThumbnailQueueTests.author,
+            image=SimpleUploadedFile('broken.png', b'not an image')
+        )
+        ThumbnailTask.objects.create(post=post)
+        with self.assertLogs('posts.thumbnails', 'ERROR'):
+            with self.assertLogs('sorl.thumbnail', 'ERROR'):
+                self.process()
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnail_ready)
+        self.assertFalse(ThumbnailTask.objects.exists())
+
+    def test_backfill_enqueues_existing_images(self):
+        """Команда backfill_thumbnails ставит в очередь старые записи."""
+        with_image = Post.objects.create(
+            text='С картинкой',
+            author=ThumbnailQueueTests.author,
+            image=image_file()
+        )
+        Post.objects.create(text='Без картинки', author=with_image.author)
+        call_command('backfill_thumbnails', stdout=StringIO())
+        self.assertEqual(
+            list(ThumbnailTask.objects.values_list('post', flat=True)),
+            [with_image.id]
+        )
+        self.process()
+        with_image.refresh_from_db()
+        self.assertTrue(with_image.thumbnail_ready)
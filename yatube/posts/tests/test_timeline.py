@@ -0,0 +1,123 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import (
+    Follow, Post, TimelineBackfill, TimelineEntry, User
+)
+from posts.timeline import process_backfills
+
+POST_TEXT = 'Текст тестового поста'
+FOLLOW_URL = reverse('posts:follow_index')
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.another_author = User.objects.create(username='another')
+        cls.reader = User.objects.create(username='reader')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(TimelineTests.reader)
+
+    def feed(self, **params):
+        return list(
+            self.reader_client.get(FOLLOW_URL, params).context['page']
+        )
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новая запись попадает в ленту подписчика при публикации."""
+        Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.author
+        )
+        post = Post.objects.create(
+            text=POST_TEXT, author=TimelineTests.author
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=TimelineTests.reader, post=post
+            ).exists()
+        )
+        self.assertEqual(self.feed(), [post])
+
+    def test_follow_backfills_and_unfollow_cleans_up(self):
+        """Подписка добавляет прежние записи автора, отписка их убирает."""
+        post = Post.objects.create(
+            text=POST_TEXT, author=TimelineTests.author
+        )
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[TimelineTests.author])
+        )
+        self.assertEqual(self.feed(), [post])
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[TimelineTests.author])
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=TimelineTests.reader).exists()
+        )
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1, NUMBER_OF_POSTS=2)
+    def test_popular_author_is_merged_on_read(self):
+        """Записи популярного автора читаются напрямую и сливаются с лентой."""
+        Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.author
+        )
+        Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.another_author
+        )
+        Follow.objects.create(
+            user=TimelineTests.another_author, author=TimelineTests.author
+        )
+        posts = [
+            Post.objects.create(text=POST_TEXT, author=author)
+            for author in (
+                TimelineTests.author,
+                TimelineTests.another_author,
+                TimelineTests.author,
+            )
+        ]
+        self.assertFalse(
+            TimelineEntry.objects.filter(
+                post__author=TimelineTests.author
+            ).exists()
+        )
+        response = self.reader_client.get(FOLLOW_URL)
+        page = response.context['page']
+        self.assertEqual(list(page), posts[:0:-1])
+        self.assertEqual(
+            self.feed(after=page.paginator.next_cursor), posts[:1]
+        )
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_unpopular_author_is_backfilled_from_queue(self):
+        """
+        Записи автора, переставшего быть популярным, раскладываются по
+        лентам из очереди, а до этого читаются напрямую.
+        """
+        Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.author
+        )
+        follow = Follow.objects.create(
+            user=TimelineTests.another_author, author=TimelineTests.author
+        )
+        post = Post.objects.create(
+            text=POST_TEXT, author=TimelineTests.author
+        )
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertTrue(
+            TimelineBackfill.objects.filter(
+                author=TimelineTests.author
+            ).exists()
+        )
+        self.assertEqual(self.feed(), [post])
+        self.assertEqual(process_backfills(), 1)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=TimelineTests.reader, post=post
+            ).exists()
+        )
+        self.assertFalse(TimelineBackfill.objects.exists())
+        self.assertEqual(self.feed(), [post])
@@ -1,5 +1,7 @@
 from django.test import Client, TestCase
+from django.urls import get_resolver, reverse
 from posts.models import Group, Post, User
+from users.forms import RESERVED_USERNAMES
 
 GROUP_TITLE = 'Заголовок тестовой группы'
 GROUP_SLUG = 'test-slug'
@@ -106,3 +108,34 @@ class PostsURLTests(TestCase):
             URL_NAMES['for_authorized_users'][2]
         )
         self.assertEqual(response.status_code, 200)
+
+
+class ReservedUsernamesTests(TestCase):
+    def test_site_paths_are_reserved(self):
+        """Имена, совпадающие с адресами сайта, зарезервированы."""
+        patterns = (
+            get_resolver().url_patterns
+            + get_resolver('posts.urls').url_patterns
+        )
+        for pattern in patterns:
+            segment = str(pattern.pattern).split('/')[0]
+            if segment and not segment.startswith('<'):
+                with self.subTest(segment=segment):
+                    self.assertIn(segment, RESERVED_USERNAMES)
+
+    def test_signup_rejects_reserved_usernames(self):
+        """Регистрация с зарезервированным именем не проходит."""
+        for username in ('search', 'export', 'rss', 'Atom'):
+            with self.subTest(username=username):
+                response = Client().post(reverse('users:signup'), {
+                    'username': username,
+                    'password1': 'Sup3r-secret!',
+                    'password2': 'Sup3r-secret!',
+                })
+                self.assertFormError(
+                    response, 'form', 'username',
+                    'Это имя занято адресом сайта, выберите другое.'
+                )
+                self.assertFalse(
+                    User.objects.filter(username=username).exists()
+                )
@@ -6,9 +6,11 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -101,6 +103,7 @@ class PostPagesTests(TestCase):
         super().tearDownClass()
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.author_client = Client()
         self.author_client.force_login(PostPagesTests.user)
@@ -224,14 +227,38 @@ class PostPagesTests(TestCase):
                 self.assertIsInstance(form_field, expected)
 
     def test_cache_index_page(self):
-        """Список записей хранится в кэше и обновлялся раз в 20 секунд."""
-        Post.objects.create(text=CACHE_TEXT, author=PostPagesTests.user)
+        """
+        Список записей хранится в кэше, пока в ленте ничего не изменилось,
+        и сбрасывается при публикации новой записи.
+        """
+        cache.clear()
+        self.author_client.get(URLS[0])
+        Post.objects.filter(pk=PostPagesTests.post.pk).update(text=CACHE_TEXT)
         response = self.author_client.get(URLS[0])
         self.assertNotContains(response, CACHE_TEXT)
-        cache.clear()
+        Post.objects.create(text=POST_TEXT, author=PostPagesTests.user)
         response = self.author_client.get(URLS[0])
         self.assertContains(response, CACHE_TEXT)
 
+    def test_cache_invalidation_is_scoped(self):
+        """Запись в чужой группе не сбрасывает кэш ленты группы."""
+        cache.clear()
+        group_url = URLS[1]
+        self.guest_client.get(group_url)
+        Post.objects.filter(pk=PostPagesTests.post.pk).update(text=CACHE_TEXT)
+        Post.objects.create(
+            text=POST_TEXT,
+            author=PostPagesTests.user,
+            group=PostPagesTests.another_group
+        )
+        self.assertNotContains(self.guest_client.get(group_url), CACHE_TEXT)
+        Comment.objects.create(
+            text=POST_TEXT,
+            post=PostPagesTests.post,
+            author=PostPagesTests.user
+        )
+        self.assertContains(self.guest_client.get(group_url), CACHE_TEXT)
+
 
 class PaginatorViewsTests(TestCase):
     @classmethod
@@ -253,6 +280,7 @@ class PaginatorViewsTests(TestCase):
         Post.objects.bulk_create(cls.objs)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_paginator(self):
@@ -266,8 +294,41 @@ class PaginatorViewsTests(TestCase):
                 self.assertEqual(
                     len(response.context['page']), settings.NUMBER_OF_POSTS
                 )
-                response = self.guest_client.get(reverse_name + '?page=2')
+                cursor = response.context['page'].paginator.next_cursor
+                response = self.guest_client.get(
+                    reverse_name + f'?after={cursor}'
+                )
                 self.assertEqual(len(response.context['page']), 3)
+                self.assertFalse(response.context['page'].has_next())
+
+    def test_paginator_previous_page(self):
+        """Со второй страницы можно вернуться на первую по курсору."""
+        first = self.guest_client.get(URLS[0]).context['page']
+        second = self.guest_client.get(
+            URLS[0] + f'?after={first.paginator.next_cursor}'
+        ).context['page']
+        self.assertTrue(second.has_previous())
+        response = self.guest_client.get(
+            URLS[0] + f'?before={second.paginator.previous_cursor}'
+        )
+        self.assertEqual(
+            list(response.context['page']), list(first.object_list)
+        )
+        self.assertFalse(response.context['page'].has_previous())
+
+    def test_paginator_ignores_invalid_cursor(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.guest_client.get(URLS[0] + '?after=abc')
+        self.assertEqual(
+            len(response.context['page']), settings.NUMBER_OF_POSTS
+        )
+        self.assertFalse(response.context['page'].has_previous())
+
+    @override_settings(POSTS_PAGINATION='pages')
+    def test_paginator_by_page_number(self):
+        """При POSTS_PAGINATION = 'pages' страницы листаются по номеру."""
+        response = self.guest_client.get(URLS[0] + '?page=2')
+        self.assertEqual(len(response.context['page']), 3)
 
 
 class FollowViewsTests(TestCase):
@@ -315,3 +376,82 @@ class FollowViewsTests(TestCase):
         ).delete()
         response = self.follower_client.get(URLS[4])
         self.assertNotIn(FollowViewsTests.post, response.context.get('page'))
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            description=GROUP_DESCRIPTION,
+            slug=GROUP_SLUG
+        )
+        cls.user = User.objects.create(username=USERNAMES['author'])
+        cls.post = Post.objects.create(
+            text=POST_TEXT,
+            author=cls.user,
+            group=cls.group
+        )
+        cls.URLS = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': GROUP_SLUG}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+            reverse(
+                'posts:post',
+                kwargs={'username': cls.user.username, 'post_id': cls.post.id}
+            ),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.guest_client.get(url)
+        return len(context)
+
+    def test_number_of_queries_does_not_depend_on_posts(self):
+        """Число запросов к БД не растёт с числом записей на странице."""
+        expected = {url: self.count_queries(url) for url in self.URLS}
+        for i in range(settings.NUMBER_OF_POSTS):
+            post = Post.objects.create(
+                text=POST_TEXT + str(i),
+                author=FeedQueriesTests.user,
+                group=FeedQueriesTests.group
+            )
+            Comment.objects.create(
+                text=POST_TEXT, post=post, author=FeedQueriesTests.user
+            )
+            Comment.objects.create(
+                text=POST_TEXT,
+                post=FeedQueriesTests.post,
+                author=User.objects.create(username=f'commentator{i}')
+            )
+        for url, count in expected.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), count)
+
+    def test_comments_count_in_feed(self):
+        """В ленте у записи есть число комментариев."""
+        Comment.objects.create(
+            text=POST_TEXT,
+            post=FeedQueriesTests.post,
+            author=FeedQueriesTests.user
+        )
+        response = self.guest_client.get(self.URLS[0])
+        self.assertEqual(response.context['page'][0].comments_count, 1)
+
+    def test_cached_feed_fragment_skips_feed_queries(self):
+        """Закэшированный фрагмент ленты не читает записи из базы."""
+        self.guest_client.force_login(FeedQueriesTests.user)
+        for url in self.URLS[:3]:
+            self.guest_client.get(url)
+            with CaptureQueriesContext(connection) as context:
+                self.guest_client.get(url)
+            with self.subTest(url=url):
+                self.assertFalse(
+                    any('"posts_comment"' in query['sql'] for query in context)
+                )
@@ -0,0 +1,140 @@
+"""
+Миниатюры изображений записей, подготовленные заранее.
+
+Представления ставят запись в очередь ThumbnailTask при загрузке или
+замене изображения, а команда process_thumbnails в пуле процессов
+делает миниатюры той же геометрии, что и шаблон, и варианты разной
+ширины (см. images) и отмечает запись thumbnail_ready. Пока миниатюра
+не готова, шаблон показывает заглушку и не вызывает Pillow при
+отрисовке страницы.
+"""
+import logging
+import time
+from concurrent.futures import as_completed
+
+from django.db.models import Q
+from sorl.thumbnail import get_thumbnail
+
+from core.metrics import registry
+
+from . import feed_cache, images
+from .models import Post, ThumbnailTask
+
+# Должны совпадать с параметрами {% thumbnail %} в includes/post_item.html.
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+BATCH_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(post):
+    """Ставит изображение записи в очередь на миниатюру."""
+    if not post.image:
+        return
+    Post.objects.filter(pk=post.pk).update(thumbnail_ready=False)
+    ThumbnailTask.objects.update_or_create(post=post)
+    feed_cache.bump(*feed_cache.post_scopes(post))
+
+
+def backfill(after=0):
+    """
+    Ставит в очередь все записи с id больше after с изображением без
+    готовой миниатюры или вариантов.
+    Возвращает число таких записей.
+    """
+    posts = Post.objects.filter(
+        Q(thumbnail_ready=False) | Q(image_formats=''),
+        thumbnail_task__isnull=True,
+        pk__gt=after
+    ).exclude(
+        Q(image='') | Q(image__isnull=True)
+    ).values_list('id', flat=True).order_by()
+    count = 0
+    batch = []
+    for post_id in posts.iterator(chunk_size=BATCH_SIZE):
+        batch.append(ThumbnailTask(post_id=post_id))
+        if len(batch) == BATCH_SIZE:
+            ThumbnailTask.objects.bulk_create(batch, ignore_conflicts=True)
+            count += len(batch)
+            batch = []
+    ThumbnailTask.objects.bulk_create(batch, ignore_conflicts=True)
+    return count + len(batch)
+
+
+def generate(name):
+    """
+    Делает миниатюру и варианты файла name; выполняется в процессе
+    пула. Возвращает форматы вариантов.
+    """
+    # sorl только пишет в лог, если не смог прочитать исходный файл.
+    if not get_thumbnail(name, GEOMETRY, **OPTIONS).exists():
+        raise OSError(f'Не удалось прочитать изображение {name}')
+    return images.make_variants(name)
+
+
+def timed_generate(name):
+    """generate() и затраченное время в секундах."""
+    start = time.perf_counter()
+    formats = generate(name)
+    return formats, time.perf_counter() - start
+
+
+def finish(task, formats):
+    """
+    Убирает задачу из очереди и отмечает миниатюру готовой, если за
+    время работы изображение не заменили новым.
+    """
+    deleted, _ = ThumbnailTask.objects.filter(
+        pk=task.pk, queued=task.queued
+    ).delete()
+    if deleted:
+        Post.objects.filter(pk=task.post_id).update(
+            thumbnail_ready=True, image_formats=formats
+        )
+        feed_cache.bump(*feed_cache.post_scopes(task.post))
+
+
+def run_inline(task):
+    try:
+        return timed_generate(task.post.image.name), None
+    except Exception as error:
+        return None, error
+
+
+def process_batch(executor=None, batch_size=BATCH_SIZE):
+    """
+    Обрабатывает до batch_size задач из очереди: в пуле executor, если
+    он передан, иначе в текущем процессе. Возвращает число задач.
+    """
+    tasks = list(
+        ThumbnailTask.objects.select_related('post').order_by(
+            'queued'
+        )[:batch_size]
+    )
+    if executor is None:
+        results = [(task, *run_inline(task)) for task in tasks]
+    else:
+        futures = {
+            executor.submit(timed_generate, task.post.image.name): task
+            for task in tasks
+        }
+        results = []
+        for future in as_completed(futures):
+            error = future.exception()
+            result = None if error else future.result()
+            results.append((futures[future], result, error))
+    for task, result, error in results:
+        if error is None:
+            formats, duration = result
+            registry.observe('yatube_thumbnail_seconds', duration)
+            finish(task, formats)
+            continue
+        # Битое изображение не должно крутиться в очереди вечно:
+        # запись остаётся с заглушкой.
+        logger.error(
+            'Не удалось сделать миниатюру записи %s: %s', task.post_id, error
+        )
+        ThumbnailTask.objects.filter(pk=task.pk, queued=task.queued).delete()
+    registry.flush()
+    return len(tasks)
@@ -0,0 +1,152 @@
+"""
+Лента подписок, материализованная при записи (fan-out on write).
+
+Новая запись автора сразу раскладывается по лентам его подписчиков.
+Записи авторов, у которых больше settings.FOLLOW_FANOUT_LIMIT
+подписчиков, по лентам не раскладываются: их читают напрямую и сливают
+с лентой при выдаче (fan-out on read).
+
+Когда автор перестаёт быть популярным, его записи раскладываются по
+лентам не в запросе на отписку, а командой process_timeline_backfills
+через очередь TimelineBackfill; пока задача в очереди, записи автора
+по-прежнему читаются напрямую.
+"""
+from django.conf import settings
+from django.db.models import FilteredRelation, Q
+
+from .models import (
+    Counters, Follow, Post, TimelineBackfill, TimelineEntry
+)
+from .paginator import KEY
+
+BATCH_SIZE = 500
+TIMELINE_KEY = ('entry__pub_date', 'entry__post_id')
+
+
+def is_popular(author_id):
+    """Автор слишком популярен, чтобы раскладывать его записи по лентам."""
+    return Counters.objects.filter(
+        user=author_id, followers__gt=settings.FOLLOW_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out(post):
+    """Добавляет новую запись в ленты подписчиков автора."""
+    followers = list(
+        Follow.objects.filter(author=post.author_id).values_list(
+            'user_id', flat=True
+        )[:settings.FOLLOW_FANOUT_LIMIT + 1]
+    )
+    if len(followers) > settings.FOLLOW_FANOUT_LIMIT:
+        return
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту пользователя уже опубликованные записи автора."""
+    if is_popular(author_id):
+        return
+    posts = Post.objects.filter(author=author_id).values_list(
+        'id', 'pub_date'
+    ).order_by()
+    insert(
+        (user_id, post_id, pub_date)
+        for post_id, pub_date in posts.iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def backfill_follows(last_follow_id):
+    """
+    Заполняет ленты по всем подпискам с id больше last_follow_id одним
+    проходом, например после массовой загрузки подписок.
+    """
+    rows = Post.objects.filter(
+        author__following__id__gt=last_follow_id
+    ).exclude(
+        author__counters__followers__gt=settings.FOLLOW_FANOUT_LIMIT
+    ).values_list('author__following__user', 'id', 'pub_date').order_by()
+    insert(rows.iterator(chunk_size=BATCH_SIZE))
+
+
+def insert(rows):
+    """Пишет пачками строки ленты (user_id, post_id, pub_date)."""
+    batch = []
+    for user_id, post_id, pub_date in rows:
+        batch.append(
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        )
+        if len(batch) == BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def clean_up(user_id, author_id):
+    """Убирает записи автора из ленты пользователя."""
+    TimelineEntry.objects.filter(
+        user=user_id, post__author=author_id
+    ).delete()
+    if Counters.objects.filter(
+        user=author_id, followers=settings.FOLLOW_FANOUT_LIMIT
+    ).exists():
+        # Автор только что перестал быть популярным: его последние записи
+        # не раскладывались по лентам. Подписчиков может быть до
+        # FOLLOW_FANOUT_LIMIT, поэтому раскладываем их вне запроса.
+        TimelineBackfill.objects.update_or_create(author_id=author_id)
+
+
+def process_backfills(limit=BATCH_SIZE):
+    """
+    Раскладывает по лентам подписчиков записи авторов из очереди
+    TimelineBackfill, не больше limit авторов за вызов. Возвращает
+    число обработанных задач.
+    """
+    tasks = list(
+        TimelineBackfill.objects.order_by('queued').values_list(
+            'author_id', 'queued'
+        )[:limit]
+    )
+    for author_id, queued in tasks:
+        if not is_popular(author_id):
+            insert(
+                Post.objects.filter(author=author_id).values_list(
+                    'author__following__user', 'id', 'pub_date'
+                ).order_by().iterator(chunk_size=BATCH_SIZE)
+            )
+        # Задачу, поставленную заново во время обработки, не удаляем.
+        TimelineBackfill.objects.filter(
+            author_id=author_id, queued=queued
+        ).delete()
+    return len(tasks)
+
+
+def follow_feed(user):
+    """
+    Источники ленты подписок для KeysetPaginator: материализованная
+    лента и записи каждого популярного автора, на которого подписан
+    пользователь, — каждый источник читается своим индексом.
+
+    Авторы, чьи записи ещё ждут раскладки в очереди TimelineBackfill,
+    читаются так же, как популярные; повторы слияние отбрасывает.
+    """
+    popular = Follow.objects.filter(
+        Q(author__counters__followers__gt=settings.FOLLOW_FANOUT_LIMIT)
+        | Q(author__timeline_backfill__isnull=False),
+        user=user
+    ).values_list('author', flat=True)
+    entries = Post.objects.for_feed().annotate(
+        entry=FilteredRelation('timeline', condition=Q(timeline__user=user))
+    )
+    sources = [(entries, TIMELINE_KEY)]
+    sources.extend(
+        (Post.objects.for_feed().filter(author=author_id), KEY)
+        for author_id in popular
+    )
+    return sources
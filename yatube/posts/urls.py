@@ -1,14 +1,43 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
     path('new/', views.new_post, name='new_post'),
     path('', views.index, name='index'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/stream/', views.follow_stream, name='follow_stream'),
+    path('search/', views.search, name='search'),
+    path('export/', views.export, name='export'),
+    path('rss/', feeds.index_rss, name='index_rss'),
+    path('api/posts/', api.posts, name='api_posts'),
+    path('api/posts/<int:post_id>/', api.post, name='api_post'),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.comments,
+        name='api_comments'
+    ),
+    path('api/groups/', api.groups, name='api_groups'),
+    path('api/groups/<slug:slug>/', api.group, name='api_group'),
+    path('api/profiles/<str:username>/', api.profile, name='api_profile'),
+    path(
+        'api/profiles/<str:username>/followers/',
+        api.followers,
+        name='api_followers'
+    ),
+    path(
+        'api/profiles/<str:username>/following/',
+        api.following,
+        name='api_following'
+    ),
+    path('atom/', feeds.index_atom, name='index_atom'),
+    path('<str:username>/rss/', feeds.author_rss, name='author_rss'),
+    path('<str:username>/atom/', feeds.author_atom, name='author_atom'),
     path('<str:username>/', views.profile, name='profile'),
     path(
         '<username>/<int:post_id>/comment/',
@@ -21,6 +50,11 @@ urlpatterns = [
         name='post_edit'
     ),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.comments,
+        name='comments'
+    ),
     path(
         '<str:username>/follow/',
         views.profile_follow,
@@ -1,52 +1,140 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.replicas import replica_reads
+
+from . import stream, thumbnails
+from .broker import broker
+from .export import export_zip
+from .feed_cache import feed_cache
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Group, Post, User
+from .page_cache import anonymous_page_cache
+from .paginator import KeysetPaginator
+from .search import search as search_posts
+from .timeline import follow_feed
+
 
+def get_page(request, post_list, lazy=False):
+    """
+    Страница ленты. По умолчанию листается по ключу (pub_date, id),
+    при POSTS_PAGINATION = 'pages' — по номеру страницы.
+
+    С lazy=True записи читаются только при отрисовке страницы, чтобы
+    закэшированный фрагмент ленты не стоил запросов к базе.
+    """
+    if settings.POSTS_PAGINATION == 'pages':
+        paginator = Paginator(post_list, settings.NUMBER_OF_POSTS)
+        return paginator.get_page(request.GET.get('page'))
+    paginator = KeysetPaginator(post_list, settings.NUMBER_OF_POSTS)
+    get = paginator.lazy_page if lazy else paginator.get_page
+    return get(
+        after=request.GET.get('after'),
+        before=request.GET.get('before')
+    )
+
+
+def get_comments(request, post_id):
+    """Страница комментариев к записи: от новых к старым по курсору."""
+    paginator = KeysetPaginator(
+        Comment.objects.filter(post=post_id).select_related('author'),
+        settings.NUMBER_OF_COMMENTS,
+        key=('created', 'id')
+    )
+    return paginator.lazy_page(after=request.GET.get('after'))
 
+
+def group_scopes(slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True
+    ).first()
+    if group_id is not None:
+        return (f'group:{group_id}',)
+
+
+def profile_scopes(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True
+    ).first()
+    if author_id is not None:
+        return (f'author:{author_id}', f'counters:{author_id}')
+
+
+@replica_reads
+@anonymous_page_cache(lambda: ('index',))
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'posts/index.html', {'page': page})
+    post_list = Post.objects.for_feed()
+    page = get_page(request, post_list, lazy=True)
+    return render(
+        request,
+        'posts/index.html',
+        {'page': page, 'feed_cache': feed_cache('index')}
+    )
 
 
+@replica_reads
+@anonymous_page_cache(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = group.posts.for_feed()
+    page = get_page(request, post_list, lazy=True)
     return render(
-        request, 'posts/group.html', {'group': group, 'page': page})
+        request,
+        'posts/group.html',
+        {
+            'group': group,
+            'page': page,
+            'feed_cache': feed_cache(f'group:{group.id}')
+        }
+    )
 
 
+@replica_reads
+@anonymous_page_cache(profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('counters'),
+        username=username
+    )
+    post_list = author.posts.for_feed()
+    page = get_page(request, post_list, lazy=True)
     following = None
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user,
             author=author
-        ).count()
+        ).exists()
     return render(
         request,
         'posts/profile.html',
-        {'author': author, 'page': page, 'following': following}
+        {
+            'author': author,
+            'page': page,
+            'following': following,
+            'feed_cache': feed_cache(f'author:{author.id}')
+        }
     )
 
 
+def comments_scopes(username, post_id):
+    return (f'comments:{post_id}',)
+
+
+def get_post(username, post_id):
+    """Запись вместе с автором, группой и числом комментариев."""
+    return get_object_or_404(
+        Post.objects.for_feed().select_related('author__counters'),
+        id=post_id,
+        author__username=username
+    )
+
+
+@replica_reads
 def post_view(request, username, post_id):
-    author = get_object_or_404(User, username=username)
-    post = Post.objects.get(id=post_id)
+    post = get_post(username, post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -58,7 +146,51 @@ def post_view(request, username, post_id):
     return render(
         request,
         'posts/post.html',
-        {'author': author, 'post': post, 'form': form}
+        {
+            'author': post.author,
+            'post': post,
+            'comments': get_comments(request, post.id),
+            'feed_cache': feed_cache(f'comments:{post.id}'),
+            'form': form
+        }
+    )
+
+
+@anonymous_page_cache(comments_scopes)
+def comments(request, username, post_id):
+    """Фрагмент со следующей страницей комментариев для подгрузки."""
+    get_object_or_404(
+        Post.objects.only('id'), id=post_id, author__username=username
+    )
+    return render(
+        request,
+        'includes/comment_list.html',
+        {
+            'username': username,
+            'post_id': post_id,
+            'comments': get_comments(request, post_id),
+            'feed_cache': feed_cache(f'comments:{post_id}')
+        }
+    )
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    posts, previous_cursor, next_cursor = search_posts(
+        query,
+        settings.NUMBER_OF_POSTS,
+        after=request.GET.get('after'),
+        before=request.GET.get('before')
+    )
+    return render(
+        request,
+        'posts/search.html',
+        {
+            'query': query,
+            'posts': posts,
+            'previous_cursor': previous_cursor,
+            'next_cursor': next_cursor
+        }
     )
 
 
@@ -70,6 +202,7 @@ def new_post(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.enqueue(post)
         return redirect('posts:index')
     form = PostForm()
     return render(request, 'posts/new.html', {'form': form, 'text': text})
@@ -86,6 +219,8 @@ def post_edit(request, username, post_id):
     )
     if form.is_valid():
         post.save()
+        if 'image' in form.changed_data:
+            thumbnails.enqueue(post)
         return redirect('posts:post', username=post.author, post_id=post.id)
     if request.user == post.author:
         return render(
@@ -96,6 +231,17 @@ def post_edit(request, username, post_id):
     return redirect('posts:post', username=post.author, post_id=post.id)
 
 
+@login_required
+def export(request):
+    response = StreamingHttpResponse(
+        export_zip(request.user), content_type='application/zip'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="yatube-{request.user.pk}.zip"'
+    )
+    return response
+
+
 def page_not_found(request, exception):
     return render(
         request,
@@ -111,8 +257,7 @@ def server_error(request):
 
 @login_required
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    author = get_object_or_404(User, username=username)
+    post = get_post(username, post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -124,19 +269,51 @@ def add_comment(request, username, post_id):
     return render(
         request,
         'posts/post.html',
-        {'form': form, 'author': author, 'post': post}
+        {
+            'form': form,
+            'author': post.author,
+            'post': post,
+            'comments': get_comments(request, post.id),
+            'feed_cache': feed_cache(f'comments:{post.id}')
+        }
     )
 
 
 @login_required
+@replica_reads
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    if settings.POSTS_PAGINATION == 'pages':
+        post_list = Post.objects.for_feed().filter(
+            author__following__user=request.user
+        )
+    else:
+        post_list = follow_feed(request.user)
+    page = get_page(request, post_list)
     return render(request, 'posts/follow.html', {'page': page})
 
 
+@login_required
+def follow_stream(request):
+    """SSE-поток уведомлений о новых записях в ленте подписок."""
+    if broker.subscribers >= settings.SSE_MAX_CONNECTIONS:
+        response = HttpResponse(status=503)
+        response['Retry-After'] = settings.SSE_RETRY
+        return response
+    last_event_id = request.META.get(
+        'HTTP_LAST_EVENT_ID', request.GET.get('last_event_id', '')
+    )
+    response = StreamingHttpResponse(
+        stream.follow_events(
+            request.user,
+            int(last_event_id) if last_event_id.isdigit() else None
+        ),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
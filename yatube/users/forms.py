@@ -1,10 +1,27 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
 
 User = get_user_model()
 
+# Первые сегменты адресов сайта: профиль /<username>/ с таким именем
+# перекрывался бы страницей, объявленной в urls.py раньше него.
+RESERVED_USERNAMES = frozenset((
+    'about', 'admin', 'api', 'atom', 'auth', 'export', 'follow', 'group',
+    'media', 'metrics', 'new', 'rss', 'search', 'static',
+))
+
 
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        if username.lower() in RESERVED_USERNAMES:
+            raise ValidationError(
+                'Это имя занято адресом сайта, выберите другое.',
+                code='reserved'
+            )
+        return username
@@ -1,6 +1,9 @@
 import os
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Рабочие файлы сервера (кэш, журналы, метрики, профили),
+# переопределяется YATUBE_RUN_DIR
+RUN_DIR = os.environ.get('YATUBE_RUN_DIR', os.path.join(BASE_DIR, 'run'))
 
 
 SECRET_KEY = '$6%b9%gp#1lx5$gn0%s@2nvvm4zeisa=^q$ovei67vx0k0h&98'
@@ -30,12 +33,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.request_metrics.RequestMetricsMiddleware',
+    'core.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.replicas.PrimaryPinMiddleware',
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -44,7 +52,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.request_metrics.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -65,10 +73,41 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.environ.get(
+            'YATUBE_DB', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# PRAGMA для каждого нового соединения SQLite (core.sqlite); пустой
+# словарь оставляет настройки SQLite по умолчанию
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+# Реплики для чтения лент: YATUBE_REPLICAS копий основной базы, которые
+# обновляет команда sync_replicas. В тестах реплики смотрят в основную.
+DATABASE_REPLICAS = [
+    f'replica{number}'
+    for number in range(1, int(os.environ.get('YATUBE_REPLICAS', 0)) + 1)
+]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.{alias}.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_PIN_SECONDS = 10
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -108,6 +147,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+TEST_RUNNER = 'core.testing.TestRunner'
+
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -118,9 +159,101 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 NUMBER_OF_POSTS = 10
+NUMBER_OF_COMMENTS = 20
+# Размер страницы JSON API по умолчанию и наибольший limit= и ids=
+API_PAGE_SIZE = 20
+API_MAX_LIMIT = 100
+# 'keyset' — листание по курсору (pub_date, id), 'pages' — по номеру страницы
+POSTS_PAGINATION = 'keyset'
+# Записи авторов с большим числом подписчиков не раскладываются по лентам
+FOLLOW_FANOUT_LIMIT = 1000
+
+# SSE-поток новых записей /follow/stream/: не больше SSE_MAX_CONNECTIONS
+# соединений на процесс, комментарий-пульс каждые SSE_HEARTBEAT секунд,
+# переподключение через SSE_STREAM_TIMEOUT секунд с паузой SSE_RETRY
+SSE_MAX_CONNECTIONS = 100
+SSE_HEARTBEAT = 15
+SSE_STREAM_TIMEOUT = 5 * 60
+SSE_RETRY = 3
+
+# Сколько одинаковых по форме SQL-запросов за запрос считать N+1
+NPLUSONE_THRESHOLD = 5
+# Предел SQL-запросов на представление; при QUERY_BUDGET_STRICT
+# (YATUBE_QUERY_BUDGET_STRICT=1, в тестах — всегда, см. core.testing)
+# превышение — ошибка
+QUERY_BUDGETS = {
+    'posts.views.index': 5,
+    'posts.views.group_posts': 6,
+    'posts.views.profile': 7,
+    'posts.views.post_view': 6,
+    'posts.views.comments': 5,
+    'posts.views.follow_index': 9,
+    'posts.views.search': 4,
+}
+QUERY_BUDGET_STRICT = os.environ.get('YATUBE_QUERY_BUDGET_STRICT') == '1'
 
+# Запросы дольше SLOW_QUERY_THRESHOLD секунд пишутся с планом в
+# SLOW_QUERY_LOG (JSONL; вращать внешне, например logrotate); см. команду
+# slowqueries. Строковые параметры запросов скрываются, если не включить
+# SLOW_QUERY_LOG_PARAMS
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_LOG = os.path.join(RUN_DIR, 'slow-queries.jsonl')
+SLOW_QUERY_LOG_PARAMS = False
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'core.logs.PrivateFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'encoding': 'utf-8',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Метрики Prometheus: процессы складывают их в общий METRICS_FILE не
+# чаще раза в METRICS_FLUSH_INTERVAL секунд; /metrics открыт сотрудникам
+# и по заголовку Authorization: Bearer METRICS_TOKEN
+METRICS_FILE = os.path.join(RUN_DIR, 'metrics.json')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
+
+# Профилирование запроса по токену из команды profiling_token (только
+# сотрудники): файлы в PROFILING_DIR, в сводке PROFILING_TOP строк
+PROFILING_DIR = os.path.join(RUN_DIR, 'profiles')
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_TOP = 30
+PROFILING_TRACEBACK_DEPTH = 10
+
+# Ленты сбрасываются версиями при записи, поэтому хранятся долго
+FEED_CACHE_TIMEOUT = 60 * 60
+
+# Сколько секунд после истечения отдавать устаревший кэш, пока один
+# запрос собирает его заново
+CACHE_STALE_GRACE = 60
+# Сколько секунд ждать чужой сборки кэша, прежде чем собирать самому
+CACHE_REBUILD_TIMEOUT = 10
+
+# Общий для всех процессов сервера кэш в файле, отображённом в память;
+# файл лежит в RUN_DIR, тесты берут свой, см. core.testing
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.shared_memory.SharedMemoryCache',
+        'LOCATION': os.path.join(RUN_DIR, 'yatube.cache'),
+        'OPTIONS': {
+            'SLOTS': 2048,
+            'SLOT_SIZE': 64 * 1024,
+        },
     }
 }